@@ -3,102 +3,377 @@ AI Analyzer - Token and market sentiment analysis using LLMs
 Uses OpenAI/Anthropic to analyze tokens, social sentiment, and generate insights
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional, Union
 from datetime import datetime
-import json
 
+import httpx
+import msgspec
+import numpy as np
+import orjson
+from cachetools import TTLCache
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
+from prometheus_client import Gauge
+
+from ai.cache import LLMCache
+from ai.ratelimit import RateLimiter, estimate_tokens, preload_encodings
+from ai.scheduler import BinnedScheduler
 
 logger = logging.getLogger(__name__)
 
+# Only near-deterministic completions are worth caching
+CACHE_MAX_TEMPERATURE = 0.4
+
+
+# msgspec Structs both decode responses and define the JSON schemas sent as
+# response_format; forbid_unknown_fields makes the schema additionalProperties: false
+
+class ContractAnalysis(msgspec.Struct, frozen=True, forbid_unknown_fields=True):
+    """Structured output for token contract analysis"""
+    risk_score: int
+    red_flags: List[str]
+    positive_signals: List[str]
+    recommendation: Literal["BUY", "HOLD", "AVOID"]
+    reasoning: str
+
+
+class SentimentAnalysis(msgspec.Struct, frozen=True, forbid_unknown_fields=True):
+    """Structured output for social sentiment analysis"""
+    sentiment_score: int
+    fomo_level: Literal["Low", "Medium", "High"]
+    key_themes: List[str]
+    concerns: List[str]
+    market_mood: str
+
+
+def json_schema_format(struct: type[msgspec.Struct]) -> Dict:
+    """Build a strict structured-output response_format for a msgspec Struct"""
+    # msgspec puts the Struct under $defs behind a $ref; the API wants it inline
+    schema = msgspec.json.schema(struct)["$defs"][struct.__name__]
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": struct.__name__,
+            "schema": schema,
+            "strict": True
+        }
+    }
+
+
+CONTRACT_ANALYSIS_FORMAT = json_schema_format(ContractAnalysis)
+SOCIAL_SENTIMENT_FORMAT = json_schema_format(SentimentAnalysis)
+
+# Static instructions go in the system message and dynamic data last in the
+# user message, so OpenAI can serve the shared prefix from its prompt cache
+SYSTEM_PROMPT_CONTRACT = """
+You are a Solana blockchain expert analyzing tokens for potential risks and opportunities.
+
+You will be given a token's contract details, holder distribution and liquidity.
+Analyze the token and provide:
+1. Risk Score (0-100, where 100 is highest risk)
+2. Key Red Flags (if any)
+3. Positive Signals (if any)
+4. Overall Recommendation (BUY/HOLD/AVOID)
+5. Brief reasoning
+""".strip()
+
+SYSTEM_PROMPT_SENTIMENT = """
+You are a crypto social sentiment analyst.
+
+You will be given a token symbol and a list of recent tweets about it.
+Provide:
+1. Sentiment Score (-100 to +100, where -100 is very bearish, +100 is very bullish)
+2. FOMO Level (Low/Medium/High)
+3. Key Themes (list of main topics discussed)
+4. Potential Concerns (if any)
+5. Overall Market Mood (one sentence)
+""".strip()
+
+SYSTEM_PROMPT_TIP = """
+You are a pragmatic trading advisor for crypto traders.
+
+You will be given current market conditions.
+Generate a concise, actionable trading tip (2-3 sentences) for Solana trenchers.
+Focus on risk management and current market dynamics.
+Keep it real and helpful - no hype, just facts.
+""".strip()
+
+SYSTEM_PROMPT_MARKET_DAY = """
+You are a crypto market analyst writing for Twitter.
+
+You will be given today's key Solana trading stats.
+Write a brief, engaging summary (3-4 sentences) for a Twitter post.
+Include key takeaways and lessons learned.
+Use emojis appropriately.
+""".strip()
+
+# Prompt field defaults, merged under caller data once per analysis
+CONTRACT_DEFAULTS = {
+    "total_supply": "Unknown",
+    "decimals": "Unknown",
+    "mint_authority_revoked": False,
+    "freeze_authority_revoked": False
+}
+HOLDER_DEFAULTS = {
+    "total_holders": 0,
+    "top_10_pct": 0,
+    "dev_holdings_pct": 0
+}
+LIQUIDITY_DEFAULTS = {
+    "total_usd": 0,
+    "locked": False,
+    "lock_duration_days": 0
+}
+
+PROMPT_CACHE_HIT_RATIO = Gauge(
+    "soly_llm_prompt_cache_hit_ratio",
+    "Share of OpenAI prompt tokens served from the prompt cache"
+)
+
 
 class TokenAnalyzer:
     """AI-powered token and market analyzer"""
     
-    def __init__(self, openai_api_key: str, model: str = "gpt-4-turbo-preview"):
-        self.openai_client = AsyncOpenAI(api_key=openai_api_key)
+    def __init__(self,
+                 openai_api_key: str,
+                 model: str = "gpt-4-turbo-preview",
+                 fast_model: str = "gpt-4o-mini",
+                 cache: Optional[LLMCache] = None,
+                 max_requests_per_minute: int = 500,
+                 max_tokens_per_minute: int = 150000):
+        # One long-lived connection pool for all OpenAI calls
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            http2=True,
+            timeout=30
+        )
+        self.openai_client = AsyncOpenAI(api_key=openai_api_key, http_client=self.http_client)
         self.model = model
         self.is_ready = True
         
-        # Analysis cache to avoid redundant API calls
-        self.cache: Dict[str, Dict] = {}
+        # Cheaper model for short-form generations (tips, recaps)
+        self.fast_model = fast_model
+        
+        # Response cache to avoid redundant API calls
+        self.cache = cache
         
-        logger.info(f"🤖 AI Analyzer initialized with model: {model}")
+        # In-process contract analysis cache, with one lock per key so
+        # concurrent analyses of the same token share a single API call
+        self.contract_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+        self._contract_locks: Dict[str, asyncio.Lock] = {}
+        self._contract_lock_users: Dict[str, int] = {}  # holders + waiters per lock
+        
+        # OpenAI prompt-prefix cache usage
+        self.prompt_tokens_total = 0
+        self.cached_prompt_tokens_total = 0
+        
+        # Stay under OpenAI RPM/TPM limits instead of retrying on 429s
+        self.rate_limiter = RateLimiter(max_requests_per_minute, max_tokens_per_minute)
+        
+        # Coalesce concurrent requests into batched dispatches, binned by
+        # completion length so tips aren't stuck behind contract analyses
+        self.scheduler = BinnedScheduler(self._dispatch_batch, bins=(200, 400, 1000))
+        
+        logger.info(f"🤖 AI Analyzer initialized with model: {model} (fast: {fast_model})")
+    
+    async def load_tokenizers(self):
+        """Load both models' tokenizers off the event loop (the first load downloads them)"""
+        await preload_encodings(self.model, self.fast_model)
+    
+    async def aclose(self):
+        """Flush pending requests and release network resources"""
+        await self.scheduler.close()
+        await self.http_client.aclose()
+        if self.cache:
+            await self.cache.close()
+        self.is_ready = False
+    
+    def _cache_key(self,
+                   prompt: str,
+                   temperature: float,
+                   scope: Optional[str] = None,
+                   model: Optional[str] = None) -> Optional[str]:
+        """Get the cache key for a completion, or None if it shouldn't be cached"""
+        if self.cache is None:
+            return None
+        if temperature > CACHE_MAX_TEMPERATURE and scope is None:
+            return None
+        return LLMCache.make_key(model or self.model, prompt, temperature, scope)
+    
+    async def _cache_get(self, key: Optional[str]):
+        """Look up a cached response"""
+        if key is None:
+            return None
+        return await self.cache.get(key)
+    
+    async def _cache_set(self, key: Optional[str], value):
+        """Store a response in the cache"""
+        if key is not None:
+            await self.cache.set(key, value)
+    
+    async def _create(self, request: Dict):
+        """Send a chat completion request once the rate limiter admits it"""
+        await self.rate_limiter.acquire(
+            estimated_tokens=estimate_tokens(request["model"], request["messages"], request["max_tokens"])
+        )
+        response = await self.openai_client.chat.completions.create(**request)
+        self._record_usage(response)
+        return response
+    
+    def _record_usage(self, response):
+        """Track how many prompt tokens OpenAI served from its prefix cache"""
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        if not isinstance(prompt_tokens, int) or not isinstance(cached_tokens, int):
+            return
+        
+        self.prompt_tokens_total += prompt_tokens
+        self.cached_prompt_tokens_total += cached_tokens
+        if self.prompt_tokens_total:
+            PROMPT_CACHE_HIT_RATIO.set(self.cached_prompt_tokens_total / self.prompt_tokens_total)
+    
+    async def _dispatch_batch(self, requests: List[Dict]) -> List:
+        """Send a batch of chat completion requests concurrently"""
+        return await asyncio.gather(
+            *(self._create(request) for request in requests),
+            return_exceptions=True
+        )
+    
+    def get_cache_stats(self) -> Dict:
+        """Get response cache statistics"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+    
+    @staticmethod
+    def _contract_cache_key(contract_data: Dict, holder_data: Dict, liquidity_data: Dict) -> str:
+        """Hash the raw analysis inputs, independent of dict ordering"""
+        payload = orjson.dumps(
+            (contract_data, holder_data, liquidity_data),
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
     
     async def analyze_token_contract(self, 
                                     contract_data: Dict,
                                     holder_data: Dict,
                                     liquidity_data: Dict) -> Dict:
         """Analyze token contract for red flags and opportunities"""
+        try:
+            key = self._contract_cache_key(contract_data, holder_data, liquidity_data)
+        except TypeError as e:
+            # Inputs orjson can't encode (e.g. Decimal) are analyzed without caching
+            logger.debug(f"Contract analysis inputs not cacheable: {e}")
+            return await self._run_contract_analysis(contract_data, holder_data, liquidity_data)
+        
+        cached = self.contract_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        lock = self._contract_locks.setdefault(key, asyncio.Lock())
+        self._contract_lock_users[key] = self._contract_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                # Another caller may have filled it while we waited
+                cached = self.contract_cache.get(key)
+                if cached is not None:
+                    return cached
+                
+                return await self._run_contract_analysis(
+                    contract_data, holder_data, liquidity_data, cache_key=key
+                )
+        finally:
+            # Only the last holder/waiter drops the lock, so no caller can install a
+            # second lock for the key while the first is still in use
+            users = self._contract_lock_users.pop(key) - 1
+            if users:
+                self._contract_lock_users[key] = users
+            elif self._contract_locks.get(key) is lock and not lock.locked():
+                del self._contract_locks[key]
+    
+    async def _run_contract_analysis(self,
+                                     contract_data: Dict,
+                                     holder_data: Dict,
+                                     liquidity_data: Dict,
+                                     cache_key: Optional[str] = None) -> Dict:
+        """Run a contract analysis, caching it under cache_key on success"""
+        try:
+            analysis = await self._analyze_token_contract(contract_data, holder_data, liquidity_data)
+        except Exception as e:
+            # Failures aren't cached, so the next call retries
+            logger.error(f"Error in AI analysis: {e}")
+            return self._failed_contract_analysis(e)
+        
+        if cache_key is not None:
+            self.contract_cache[cache_key] = analysis
+        return analysis
+    
+    @staticmethod
+    def _failed_contract_analysis(error: Exception) -> Dict:
+        """Fallback result when a contract analysis can't be completed"""
+        return {
+            "risk_score": 100,
+            "red_flags": [f"Analysis failed: {str(error)}"],
+            "positive_signals": [],
+            "recommendation": "AVOID",
+            "reasoning": "Could not complete analysis"
+        }
+    
+    async def _analyze_token_contract(self,
+                                      contract_data: Dict,
+                                      holder_data: Dict,
+                                      liquidity_data: Dict) -> Dict:
+        """Run the contract analysis, raising on failure"""
+        cd = {**CONTRACT_DEFAULTS, **contract_data}
+        hd = {**HOLDER_DEFAULTS, **holder_data}
+        ld = {**LIQUIDITY_DEFAULTS, **liquidity_data}
         
         prompt = f"""
-You are a Solana blockchain expert analyzing tokens for potential risks and opportunities.
-
 Token Contract Analysis:
-- Total Supply: {contract_data.get('total_supply', 'Unknown')}
-- Decimals: {contract_data.get('decimals', 'Unknown')}
-- Mint Authority: {'Revoked' if contract_data.get('mint_authority_revoked') else 'Active'}
-- Freeze Authority: {'Revoked' if contract_data.get('freeze_authority_revoked') else 'Active'}
+- Total Supply: {cd['total_supply']}
+- Decimals: {cd['decimals']}
+- Mint Authority: {'Revoked' if cd['mint_authority_revoked'] else 'Active'}
+- Freeze Authority: {'Revoked' if cd['freeze_authority_revoked'] else 'Active'}
 
 Holder Distribution:
-- Total Holders: {holder_data.get('total_holders', 0)}
-- Top 10 Holdings: {holder_data.get('top_10_pct', 0)}%
-- Dev Wallet Holdings: {holder_data.get('dev_holdings_pct', 0)}%
+- Total Holders: {hd['total_holders']}
+- Top 10 Holdings: {hd['top_10_pct']}%
+- Dev Wallet Holdings: {hd['dev_holdings_pct']}%
 
 Liquidity:
-- Total Liquidity: ${liquidity_data.get('total_usd', 0):,.2f}
-- Liquidity Locked: {'Yes' if liquidity_data.get('locked') else 'No'}
-- Lock Duration: {liquidity_data.get('lock_duration_days', 0)} days
-
-Analyze this token and provide:
-1. Risk Score (0-100, where 100 is highest risk)
-2. Key Red Flags (if any)
-3. Positive Signals (if any)
-4. Overall Recommendation (Buy/Hold/Avoid)
-5. Brief reasoning
-
-Format as JSON.
+- Total Liquidity: ${ld['total_usd']:,.2f}
+- Liquidity Locked: {'Yes' if ld['locked'] else 'No'}
+- Lock Duration: {ld['lock_duration_days']} days
 """
         
-        try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Solana token analyst."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=1000
-            )
-            
-            analysis_text = response.choices[0].message.content
-            
-            # Parse JSON response
-            try:
-                analysis = json.loads(analysis_text)
-            except json.JSONDecodeError:
-                # Fallback if response isn't valid JSON
-                analysis = {
-                    "risk_score": 50,
-                    "red_flags": ["Unable to parse analysis"],
-                    "positive_signals": [],
-                    "recommendation": "HOLD",
-                    "reasoning": analysis_text
-                }
-            
-            return analysis
-            
-        except Exception as e:
-            logger.error(f"Error in AI analysis: {e}")
-            return {
-                "risk_score": 100,
-                "red_flags": [f"Analysis failed: {str(e)}"],
-                "positive_signals": [],
-                "recommendation": "AVOID",
-                "reasoning": "Could not complete analysis"
-            }
+        cache_key = self._cache_key(prompt, temperature=0.3)
+        
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self.scheduler.submit(dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_CONTRACT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=400,
+            response_format=CONTRACT_ANALYSIS_FORMAT
+        ))
+        
+        analysis = msgspec.structs.asdict(msgspec.json.decode(
+            response.choices[0].message.content, type=ContractAnalysis
+        ))
+        await self._cache_set(cache_key, analysis)
+        
+        return analysis
     
     async def analyze_social_sentiment(self, 
                                       token_symbol: str,
@@ -108,33 +383,34 @@ Format as JSON.
         tweets_text = "\n".join([f"- {tweet}" for tweet in tweets[:20]])  # Limit to 20 tweets
         
         prompt = f"""
-Analyze the social sentiment for token ${token_symbol} based on these recent tweets:
+Token: ${token_symbol}
 
+Recent tweets:
 {tweets_text}
-
-Provide:
-1. Sentiment Score (-100 to +100, where -100 is very bearish, +100 is very bullish)
-2. FOMO Level (Low/Medium/High)
-3. Key Themes (list of main topics discussed)
-4. Potential Concerns (if any)
-5. Overall Market Mood (one sentence)
-
-Format as JSON.
 """
         
+        cache_key = self._cache_key(prompt, temperature=0.4)
+        
         try:
-            response = await self.openai_client.chat.completions.create(
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await self.scheduler.submit(dict(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are a crypto social sentiment analyst."},
+                    {"role": "system", "content": SYSTEM_PROMPT_SENTIMENT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.4,
-                max_tokens=800
-            )
+                max_tokens=400,
+                response_format=SOCIAL_SENTIMENT_FORMAT
+            ))
             
-            sentiment_text = response.choices[0].message.content
-            sentiment = json.loads(sentiment_text)
+            sentiment = msgspec.structs.asdict(msgspec.json.decode(
+                response.choices[0].message.content, type=SentimentAnalysis
+            ))
+            await self._cache_set(cache_key, sentiment)
             
             return sentiment
             
@@ -157,22 +433,18 @@ Current Market Conditions:
 - Volatility: {market_conditions.get('volatility', 'Unknown')}
 - Top Performers: {market_conditions.get('top_gainers', [])}
 - Recent Rugs: {market_conditions.get('recent_rugs', 0)} in last 24h
-
-Generate a concise, actionable trading tip (2-3 sentences) for Solana trenchers.
-Focus on risk management and current market dynamics.
-Keep it real and helpful - no hype, just facts.
 """
         
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,
+            response = await self.scheduler.submit(dict(
+                model=self.fast_model,
                 messages=[
-                    {"role": "system", "content": "You are a pragmatic trading advisor for crypto traders."},
+                    {"role": "system", "content": SYSTEM_PROMPT_TIP},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
                 max_tokens=200
-            )
+            ))
             
             tip = response.choices[0].message.content.strip()
             return tip
@@ -181,8 +453,12 @@ Keep it real and helpful - no hype, just facts.
             logger.error(f"Error generating tip: {e}")
             return "Market conditions are volatile. Always DYOR and never invest more than you can afford to lose."
     
-    async def detect_rug_patterns(self, transaction_history: List[Dict]) -> Dict:
-        """Detect potential rug pull patterns in transaction history"""
+    async def detect_rug_patterns(self,
+                                  transaction_history: Union[List[Dict], Dict[str, np.ndarray]]) -> Dict:
+        """
+        Detect potential rug pull patterns in transaction history
+        Accepts a list of transaction dicts, or a dict of 'type'/'amount' arrays
+        """
         
         patterns = {
             "is_suspicious": False,
@@ -198,19 +474,34 @@ Keep it real and helpful - no hype, just facts.
             # 3. Suspicious contract interactions
             # 4. Honeypot characteristics
             
-            dev_sells = [tx for tx in transaction_history if tx.get('type') == 'dev_sell']
-            lp_removes = [tx for tx in transaction_history if tx.get('type') == 'lp_remove']
+            if isinstance(transaction_history, dict):
+                # Columnar input: one vectorized pass per column
+                types = np.asarray(transaction_history['type'])
+                amounts = np.asarray(transaction_history['amount'])
+                dev_sells_count = int(np.count_nonzero(types == 'dev_sell'))
+                lp_remove_mask = types == 'lp_remove'
+                lp_removes_count = int(np.count_nonzero(lp_remove_mask))
+                lp_remove_total = float(amounts[lp_remove_mask].sum())
+            else:
+                dev_sells_count = 0
+                lp_removes_count = 0
+                lp_remove_total = 0
+                for tx in transaction_history:
+                    tx_type = tx.get('type')
+                    if tx_type == 'dev_sell':
+                        dev_sells_count += 1
+                    elif tx_type == 'lp_remove':
+                        lp_removes_count += 1
+                        lp_remove_total += tx.get('amount', 0)
             
-            if len(dev_sells) > 3:
+            if dev_sells_count > 3:
                 patterns["detected_patterns"].append("Multiple dev wallet sells detected")
                 patterns["risk_level"] = "MEDIUM"
             
-            if len(lp_removes) > 0:
-                total_removed = sum(tx.get('amount', 0) for tx in lp_removes)
-                if total_removed > 50:  # More than 50% LP removed
-                    patterns["detected_patterns"].append("Significant liquidity removal")
-                    patterns["risk_level"] = "HIGH"
-                    patterns["is_suspicious"] = True
+            if lp_removes_count > 0 and lp_remove_total > 50:  # More than 50% LP removed
+                patterns["detected_patterns"].append("Significant liquidity removal")
+                patterns["risk_level"] = "HIGH"
+                patterns["is_suspicious"] = True
             
             # Calculate confidence based on detected patterns
             patterns["confidence"] = min(len(patterns["detected_patterns"]) * 0.3, 1.0)
@@ -220,36 +511,50 @@ Keep it real and helpful - no hype, just facts.
         
         return patterns
     
-    async def summarize_market_day(self, daily_data: Dict) -> str:
-        """Generate a summary of the day's market activity"""
+    def _market_day_request(self, daily_data: Dict) -> Dict:
+        """Build the chat completion request for a daily market summary"""
         
         prompt = f"""
-Summarize today's Solana trading activity for trenchers:
-
 Key Stats:
 - New Token Launches: {daily_data.get('new_tokens', 0)}
 - Total Volume: ${daily_data.get('volume_usd', 0):,.0f}
 - Biggest Gainer: {daily_data.get('biggest_gainer', 'N/A')} (+{daily_data.get('biggest_gain_pct', 0)}%)
 - Confirmed Rugs: {daily_data.get('rugs', 0)}
 - Successful Alerts: {daily_data.get('successful_alerts', 0)}
-
-Write a brief, engaging summary (3-4 sentences) for a Twitter post.
-Include key takeaways and lessons learned.
-Use emojis appropriately.
 """
         
+        return dict(
+            model=self.fast_model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_MARKET_DAY},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.8,
+            max_tokens=300
+        )
+    
+    async def summarize_market_day(self, daily_data: Dict) -> str:
+        """Generate a summary of the day's market activity"""
+        
+        request = self._market_day_request(daily_data)
+        
+        # Identical stats on the same day get the same summary
+        cache_key = self._cache_key(
+            request["messages"][-1]["content"],
+            temperature=request["temperature"],
+            scope=datetime.utcnow().date().isoformat(),
+            model=request["model"]
+        )
+        
         try:
-            response = await self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a crypto market analyst writing for Twitter."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=300
-            )
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await self.scheduler.submit(request)
             
             summary = response.choices[0].message.content.strip()
+            await self._cache_set(cache_key, summary)
             return summary
             
         except Exception as e:
@@ -0,0 +1,78 @@
+"""
+LLM Cache - Redis-backed response cache for analyzer calls
+Keys completions on model + prompt + temperature so repeated analyses skip the API
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """Exact-match cache for LLM responses stored in Redis"""
+
+    def __init__(self,
+                 redis_url: str,
+                 ttl: int = 300,
+                 prefix: str = "soly:llm:",
+                 socket_timeout: float = 0.2):
+        # Short timeouts so an unreachable Redis degrades to a miss instead of a hang
+        self.redis = redis.from_url(
+            redis_url,
+            socket_connect_timeout=socket_timeout,
+            socket_timeout=socket_timeout
+        )
+        self.ttl = ttl
+        self.prefix = prefix
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, scope: Optional[str] = None) -> str:
+        """Build a deterministic cache key for a completion request"""
+        payload = {"model": model, "prompt": prompt, "temperature": temperature}
+        if scope:
+            payload["scope"] = scope
+        return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached response, or None on miss"""
+        try:
+            value = await self.redis.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return orjson.loads(value)
+
+    async def set(self, key: str, value: Any):
+        """Store a response under the given key"""
+        try:
+            await self.redis.set(self.prefix + key, orjson.dumps(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get cache hit/miss statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        await self.redis.aclose()
@@ -0,0 +1,141 @@
+"""
+Rate Limiter - Proactive request/token throttling for OpenAI calls
+Keeps usage under the account's RPM/TPM limits instead of retrying on 429s
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Request and token buckets that refill continuously over a minute"""
+
+    def __init__(self, max_requests_per_minute: int, max_tokens_per_minute: int):
+        self.max_requests = float(max_requests_per_minute)
+        self.max_tokens = float(max_tokens_per_minute)
+
+        # Buckets start full
+        self.available_requests = self.max_requests
+        self.available_tokens = self.max_tokens
+        self.last_refill = time.monotonic()
+
+        # Serializes waiters so requests are admitted in order
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add capacity for the time elapsed since the last refill"""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.last_refill = now
+
+        self.available_requests = min(
+            self.max_requests,
+            self.available_requests + self.max_requests * elapsed / 60
+        )
+        self.available_tokens = min(
+            self.max_tokens,
+            self.available_tokens + self.max_tokens * elapsed / 60
+        )
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait until there is capacity for one request of the given size"""
+        # A request larger than the whole bucket could never be admitted
+        tokens = min(float(estimated_tokens), self.max_tokens)
+
+        async with self._lock:
+            while True:
+                self._refill()
+
+                if self.available_requests >= 1 and self.available_tokens >= tokens:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+
+                # Sleep just long enough for the scarcer bucket to refill
+                wait_requests = (1 - self.available_requests) * 60 / self.max_requests
+                wait_tokens = (tokens - self.available_tokens) * 60 / self.max_tokens
+                wait = max(wait_requests, wait_tokens)
+                logger.debug("Rate limit reached, waiting %.2fs", wait)
+                await asyncio.sleep(wait)
+
+
+# Loaded tokenizers by model; None records a model with no usable tokenizer.
+# Download/IO failures are not stored, so a later load retries
+_ENCODINGS: Dict[str, Optional[tiktoken.Encoding]] = {}
+
+# Encoding of current OpenAI models, for ones newer than the installed tiktoken
+FALLBACK_ENCODING = "o200k_base"
+
+# Monotonic time of the last load attempt per model, to space out retries
+_LOAD_ATTEMPTS: Dict[str, float] = {}
+ENCODING_RETRY_SECONDS = 300
+
+
+def load_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Load and keep the tokenizer for a model, or None if unavailable
+    Blocking: the first load of an encoding downloads its BPE file"""
+    if model in _ENCODINGS:
+        return _ENCODINGS[model]
+
+    _LOAD_ATTEMPTS[model] = time.monotonic()
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Model unknown to this tiktoken release
+            encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+    except ValueError as e:
+        # Unknown encoding name: permanent, so remembered rather than retried
+        logger.warning(f"No tokenizer for {model}, estimating tokens from length: {e}")
+        _ENCODINGS[model] = None
+        return None
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for {model}, retrying later: {e}")
+        return None
+
+    _ENCODINGS[model] = encoding
+    return encoding
+
+
+async def preload_encodings(*models: str):
+    """Load tokenizers in worker threads so downloads never block the event loop"""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(None, load_encoding, model) for model in set(models)
+    ))
+
+
+def _retry_load_encoding(model: str):
+    """Retry a missing tokenizer in the background, at most every ENCODING_RETRY_SECONDS"""
+    last_attempt = _LOAD_ATTEMPTS.get(model)
+    if last_attempt is not None and time.monotonic() - last_attempt < ENCODING_RETRY_SECONDS:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _LOAD_ATTEMPTS[model] = time.monotonic()
+    loop.run_in_executor(None, load_encoding, model)
+
+
+def estimate_tokens(model: str, messages: List[Dict], max_tokens: int) -> int:
+    """Estimate the tokens a chat completion will consume (prompt + completion)"""
+    text = "".join(message.get("content", "") for message in messages)
+
+    # Never loaded inline: that would block the event loop on a download
+    encoding = _ENCODINGS.get(model)
+    if encoding is not None:
+        prompt_tokens = len(encoding.encode(text))
+    else:
+        if model not in _ENCODINGS:
+            _retry_load_encoding(model)
+        # ~4 characters per token rule of thumb
+        prompt_tokens = len(text) // 4
+
+    return prompt_tokens + max_tokens
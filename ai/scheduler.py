@@ -0,0 +1,42 @@
+"""
+Request Scheduler - Bins analyzer requests by expected completion length
+Each bin has its own Batcher so short generations are never queued behind long ones
+"""
+
+import asyncio
+import bisect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from ai.batcher import Batcher
+
+logger = logging.getLogger(__name__)
+
+
+class BinnedScheduler:
+    """Routes requests to per-bin Batchers keyed on max_tokens"""
+
+    def __init__(self,
+                 handler: Callable[[List[Any]], Awaitable[List[Any]]],
+                 bins: Sequence[int] = (200, 400, 1000),
+                 max_batch: int = 16,
+                 max_wait_ms: int = 50):
+        self.bins = tuple(sorted(bins))
+        self.batchers: Dict[int, Batcher] = {
+            size: Batcher(handler, max_batch=max_batch, max_wait_ms=max_wait_ms)
+            for size in self.bins
+        }
+
+    def bin_for(self, max_tokens: int) -> int:
+        """Get the smallest bin that fits a completion of max_tokens"""
+        index = bisect.bisect_left(self.bins, max_tokens)
+        return self.bins[min(index, len(self.bins) - 1)]
+
+    async def submit(self, request: Dict) -> Any:
+        """Submit a chat completion request to its bin and wait for the response"""
+        size = self.bin_for(request.get("max_tokens", self.bins[-1]))
+        return await self.batchers[size].submit(request)
+
+    async def close(self):
+        """Flush every bin"""
+        await asyncio.gather(*(batcher.close() for batcher in self.batchers.values()))
@@ -3,8 +3,12 @@ Soly API - Main FastAPI application
 Provides REST endpoints for token analysis, alerts, and community features
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+import contextlib
 from contextlib import asynccontextmanager
 import logging
 from typing import List, Optional
@@ -13,7 +17,10 @@ from api.routes import tokens, alerts, analytics, community
 from api.dependencies import get_db, get_current_user
 from blockchain.monitor import BlockchainMonitor
 from ai.analyzer import TokenAnalyzer
+from ai.cache import LLMCache
 from config import settings
+from database.bulk import bulk_copy_price_history
+from database.database import close_db, maintain_partitions
 
 # Configure logging
 logging.basicConfig(
@@ -34,18 +41,31 @@ async def lifespan(app: FastAPI):
     
     logger.info("🚀 Starting Soly API...")
     
+    # Bounded pool for sync work (run_in_executor, sync dependencies)
+    executor = ThreadPoolExecutor(max_workers=16)
+    asyncio.get_running_loop().set_default_executor(executor)
+    
     # Initialize blockchain monitor
     blockchain_monitor = BlockchainMonitor(
         rpc_url=settings.SOLANA_RPC_URL,
-        websocket_url=settings.SOLANA_WS_URL
+        websocket_url=settings.SOLANA_WS_URL,
+        price_writer=bulk_copy_price_history
     )
     await blockchain_monitor.start()
     
     # Initialize AI analyzer
     token_analyzer = TokenAnalyzer(
         openai_api_key=settings.OPENAI_API_KEY,
-        model=settings.AI_MODEL
+        model=settings.AI_MODEL,
+        fast_model=settings.AI_MODEL_FAST,
+        cache=LLMCache(settings.REDIS_URL, ttl=settings.REDIS_CACHE_TTL),
+        max_requests_per_minute=settings.OPENAI_MAX_REQUESTS_PER_MINUTE,
+        max_tokens_per_minute=settings.OPENAI_MAX_TOKENS_PER_MINUTE
     )
+    await token_analyzer.load_tokenizers()
+    
+    # Price history is written from here too, so keep its partitions ahead
+    partition_task = asyncio.create_task(maintain_partitions())
     
     logger.info("✅ Soly API started successfully")
     
@@ -53,7 +73,14 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🛑 Shutting down Soly API...")
+    partition_task.cancel()
+    # Let partition DDL unwind before the engine goes away
+    with contextlib.suppress(asyncio.CancelledError):
+        await partition_task
     await blockchain_monitor.stop()
+    await token_analyzer.aclose()
+    await close_db()
+    executor.shutdown(wait=False, cancel_futures=True)
     logger.info("👋 Soly API stopped")
 
 
@@ -63,6 +90,7 @@ app = FastAPI(
     description="Autonomous agent API for Solana trenchers",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson encodes responses, incl. datetimes
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -100,7 +128,8 @@ async def health_check():
     return {
         "status": "healthy",
         "blockchain_monitor": blockchain_monitor.is_running if blockchain_monitor else False,
-        "ai_analyzer": token_analyzer.is_ready if token_analyzer else False
+        "ai_analyzer": token_analyzer.is_ready if token_analyzer else False,
+        "llm_cache": token_analyzer.get_cache_stats() if token_analyzer else {"enabled": False}
     }
 
 
@@ -124,8 +153,10 @@ if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "api.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        loop="uvloop",
+        http="httptools",
+        reload=False,
         log_level="info"
     )
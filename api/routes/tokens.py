@@ -2,8 +2,8 @@
 Token Routes - API endpoints for token information and analysis
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Path, Query, Depends
+from typing import Annotated, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 from blockchain.monitor import BlockchainMonitor
@@ -11,6 +11,12 @@ from ai.analyzer import TokenAnalyzer
 
 router = APIRouter()
 
+# Base58 Solana address, rejected with a 422 before the handler runs
+MintAddress = Annotated[
+    str,
+    Path(min_length=32, max_length=44, pattern=r"^[1-9A-HJ-NP-Za-km-z]{32,44}$")
+]
+
 
 class TokenInfo(BaseModel):
     """Token information response model"""
@@ -62,25 +68,19 @@ async def search_tokens(
 
 
 @router.get("/{mint_address}", response_model=TokenInfo)
-async def get_token(mint_address: str):
+async def get_token(mint_address: MintAddress):
     """
     Get detailed information about a specific token
     """
-    if len(mint_address) < 32:
-        raise HTTPException(status_code=400, detail="Invalid token address")
-    
     # Implementation would fetch from database/blockchain
     raise HTTPException(status_code=404, detail="Token not found")
 
 
 @router.get("/{mint_address}/analyze", response_model=TokenAnalysisResponse)
-async def analyze_token(mint_address: str):
+async def analyze_token(mint_address: MintAddress):
     """
     Perform comprehensive risk analysis on a token
     """
-    if len(mint_address) < 32:
-        raise HTTPException(status_code=400, detail="Invalid token address")
-    
     # Implementation would:
     # 1. Fetch on-chain data
     # 2. Run AI analysis
@@ -104,8 +104,8 @@ async def analyze_token(mint_address: str):
 
 @router.get("/{mint_address}/price-history")
 async def get_price_history(
-    mint_address: str,
-    interval: str = Query(default="1h", regex="^(1m|5m|15m|1h|4h|1d)$"),
+    mint_address: MintAddress,
+    interval: Literal["1m", "5m", "15m", "1h", "4h", "1d"] = Query(default="1h"),
     limit: int = Query(default=100, le=1000)
 ):
     """
@@ -121,7 +121,7 @@ async def get_price_history(
 
 @router.get("/trending/top-gainers")
 async def get_top_gainers(
-    timeframe: str = Query(default="24h", regex="^(1h|24h|7d)$"),
+    timeframe: Literal["1h", "24h", "7d"] = Query(default="24h"),
     limit: int = Query(default=10, le=50)
 ):
     """
@@ -143,7 +143,7 @@ async def get_new_launches(
 
 
 @router.post("/{mint_address}/watchlist")
-async def add_to_watchlist(mint_address: str):
+async def add_to_watchlist(mint_address: MintAddress):
     """
     Add a token to your watchlist
     """
@@ -152,7 +152,7 @@ async def add_to_watchlist(mint_address: str):
 
 
 @router.delete("/{mint_address}/watchlist")
-async def remove_from_watchlist(mint_address: str):
+async def remove_from_watchlist(mint_address: MintAddress):
     """
     Remove a token from your watchlist
     """
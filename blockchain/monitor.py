@@ -4,18 +4,46 @@ Tracks new token launches, liquidity changes, and whale movements
 """
 
 import asyncio
+import functools
 import logging
-from typing import Dict, List, Optional, Callable
+import time
+from types import MappingProxyType
+from typing import Awaitable, Dict, FrozenSet, List, Mapping, Optional, Callable, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass
 
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.websocket_api import connect
+from solders.commitment_config import CommitmentLevel
 from solders.pubkey import Pubkey
+from solders.rpc.config import RpcTransactionLogsConfig, RpcTransactionLogsFilterMentions
+from solders.rpc.requests import LogsSubscribe
+from solders.rpc.responses import LogsNotification, SubscriptionResult
 from solders.signature import Signature
 
 logger = logging.getLogger(__name__)
 
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+
+# Buffered price rows are flushed when either limit is hit
+INSERT_MAX_WAIT_MS = 200
+INSERT_MAX_ROWS = 10_000
+
+# Pause before reconnecting a log stream the server closed cleanly
+WS_RECONNECT_DELAY = 5
+
+# Top Solana whale wallets to monitor
+DEFAULT_WHALE_WALLETS = [
+    "GThUX1Atko4tqhN2NaiTazWSeFWMuiUvfFnyJyUghFMJ",  # Example whale
+    # Add more whale addresses
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_pubkey(address: str) -> Pubkey:
+    """Parse a base58 address, memoized for repeat on-chain lookups"""
+    return Pubkey.from_string(address)
+
 
 @dataclass
 class TokenLaunch:
@@ -47,21 +75,30 @@ class LiquidityEvent:
 class BlockchainMonitor:
     """Monitors Solana blockchain for trading opportunities and risks"""
     
-    def __init__(self, rpc_url: str, websocket_url: str):
+    def __init__(self,
+                 rpc_url: str,
+                 websocket_url: str,
+                 price_writer: Optional[Callable[[List[Tuple]], Awaitable]] = None):
         self.rpc_url = rpc_url
         self.websocket_url = websocket_url
+        # Sink for batched price rows (e.g. database.bulk.bulk_copy_price_history)
+        self.price_writer = price_writer
         self.client: Optional[AsyncClient] = None
         self.is_running = False
         
         # Tracking
-        self.monitored_tokens: Dict[str, TokenLaunch] = {}
-        self.whale_wallets: List[str] = []
-        self.suspicious_contracts: set = set()
+        # Copy-on-write (snapshot, version): writers swap in a new dict, so
+        # readers holding a snapshot never see it mutate mid-iteration
+        self._monitored_tokens: Tuple[Dict[str, TokenLaunch], int] = ({}, 0)
+        self.whale_wallets: List[str] = list(DEFAULT_WHALE_WALLETS)
+        self.whale_pubkeys: List[Pubkey] = []
+        self.suspicious_contracts: FrozenSet[str] = frozenset()
         
         # Callbacks
         self.on_token_launch: Optional[Callable] = None
         self.on_liquidity_event: Optional[Callable] = None
         self.on_whale_movement: Optional[Callable] = None
+        self.on_token_alert: Optional[Callable] = None  # (TokenLaunch, analysis)
         
         # Stats
         self.stats = {
@@ -72,6 +109,14 @@ class BlockchainMonitor:
             "uptime_seconds": 0,
             "start_time": None
         }
+        self._start_ns: Optional[int] = None
+        
+        # Price points waiting to be written in one batch
+        self._price_queue: asyncio.Queue = asyncio.Queue()
+        
+        # Background tasks, kept so stop() can cancel them
+        self._monitor_tasks: List[asyncio.Task] = []
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def start(self):
         """Start the blockchain monitor"""
@@ -80,12 +125,25 @@ class BlockchainMonitor:
         self.client = AsyncClient(self.rpc_url)
         self.is_running = True
         self.stats["start_time"] = datetime.utcnow()
+        self._start_ns = time.monotonic_ns()
+        
+        # Parse whale addresses once for the scan loop; a bad entry is skipped, not fatal
+        self.whale_pubkeys = []
+        for wallet in self.whale_wallets:
+            try:
+                self.whale_pubkeys.append(parse_pubkey(wallet))
+            except ValueError as e:
+                logger.error(f"Skipping invalid whale wallet {wallet}: {e}")
         
         # Start monitoring tasks
-        asyncio.create_task(self._monitor_token_launches())
-        asyncio.create_task(self._monitor_liquidity_pools())
-        asyncio.create_task(self._monitor_whale_wallets())
-        asyncio.create_task(self._update_stats())
+        self._monitor_tasks = [
+            asyncio.create_task(self._monitor_token_launches()),
+            asyncio.create_task(self._monitor_liquidity_pools()),
+            asyncio.create_task(self._monitor_whale_wallets()),
+            asyncio.create_task(self._update_stats())
+        ]
+        # Not cancelled on stop: it is handed a sentinel and writes its last batch
+        self._flush_task = asyncio.create_task(self._flush_price_history())
         
         logger.info("✅ Blockchain monitor started")
     
@@ -94,40 +152,96 @@ class BlockchainMonitor:
         logger.info("🛑 Stopping blockchain monitor...")
         self.is_running = False
         
+        # Cancel background work before closing the client it uses
+        for task in self._monitor_tasks:
+            task.cancel()
+        await asyncio.gather(*self._monitor_tasks, return_exceptions=True)
+        self._monitor_tasks = []
+        
+        # Let the flusher write its in-progress batch and everything queued before the sentinel
+        if self._flush_task is not None:
+            self._price_queue.put_nowait(None)
+            await self._flush_task
+            self._flush_task = None
+        
+        # Write out anything still buffered
+        remaining = []
+        while not self._price_queue.empty():
+            row = self._price_queue.get_nowait()
+            if row is not None:
+                remaining.append(row)
+        await self._write_price_history(remaining)
+        
         if self.client:
             await self.client.close()
         
         logger.info("✅ Blockchain monitor stopped")
     
+    async def _subscribe_logs(self, pubkeys: List[Pubkey], handler: Callable):
+        """Stream logs mentioning any of the given accounts over one WebSocket"""
+        async with connect(self.websocket_url) as websocket:
+            # The mentions filter takes a single account, so subscribe per account.
+            # Acks can interleave with notifications, so they're matched by request id
+            config = RpcTransactionLogsConfig(CommitmentLevel.Confirmed)
+            pending: Dict[int, Pubkey] = {}  # request id -> account, until acked
+            for pubkey in pubkeys:
+                request_id = websocket.increment_counter_and_get_id()
+                pending[request_id] = pubkey
+                await websocket.send_data(
+                    LogsSubscribe(RpcTransactionLogsFilterMentions(pubkey), config, request_id)
+                )
+            
+            subscriptions: Dict[int, Pubkey] = {}  # subscription id -> account
+            async for messages in websocket:
+                if not self.is_running:
+                    break
+                for message in messages:
+                    if isinstance(message, SubscriptionResult):
+                        if message.id in pending:
+                            subscriptions[message.result] = pending.pop(message.id)
+                    elif isinstance(message, LogsNotification):
+                        await handler(subscriptions.get(message.subscription), message.result.value)
+        
+        # A clean close lands here; don't hammer the endpoint reconnecting
+        if self.is_running:
+            logger.warning("Log stream closed, reconnecting...")
+            await asyncio.sleep(WS_RECONNECT_DELAY)
+    
+    async def _emit(self, callback: Optional[Callable], *args):
+        """Invoke an optional sync or async callback"""
+        if callback is None:
+            return
+        result = callback(*args)
+        if asyncio.iscoroutine(result):
+            await result
+    
     async def _monitor_token_launches(self):
         """Monitor for new token launches"""
         logger.info("👀 Monitoring token launches...")
         
         while self.is_running:
             try:
-                # Get recent token program transactions
-                # In production, this would use WebSocket subscriptions
-                await asyncio.sleep(5)  # Check every 5 seconds
-                
-                # Simulate token detection (replace with actual RPC calls)
-                # Example: Monitor Token Program (TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA)
-                
-                logger.debug("Scanning for new token launches...")
+                # Push-mode: Token Program logs arrive as they are confirmed
+                await self._subscribe_logs([TOKEN_PROGRAM_ID], self._handle_token_program_logs)
                 
             except Exception as e:
                 logger.error(f"Error monitoring token launches: {e}")
                 await asyncio.sleep(10)
     
+    async def _handle_token_program_logs(self, pubkey: Pubkey, value):
+        """Handle Token Program logs, picking out new mint initializations"""
+        if value.err is not None:
+            return
+        
+        if any("Instruction: InitializeMint" in log for log in value.logs):
+            # Mint details (metadata, supply, creator) are resolved from the transaction
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("New mint initialized in tx %s", value.signature)
+    
     async def _monitor_liquidity_pools(self):
         """Monitor liquidity pool changes"""
         logger.info("💧 Monitoring liquidity pools...")
         
-        dex_programs = {
-            "raydium": "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
-            "orca": "9W959DqEETiGZocYWCQPaJ6sBmUzgfxXfqGeTEdp3aQP",
-            "meteora": "LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9YuVaPwxo"
-        }
-        
         while self.is_running:
             try:
                 # Monitor DEX programs for add/remove liquidity events
@@ -142,32 +256,41 @@ class BlockchainMonitor:
         """Monitor known whale wallet movements"""
         logger.info("🐋 Monitoring whale wallets...")
         
-        # Top Solana whale wallets to monitor
-        self.whale_wallets = [
-            "GThUX1Atko4tqhN2NaiTazWSeFWMuiUvfFnyJyUghFMJ",  # Example whale
-            # Add more whale addresses
-        ]
-        
         while self.is_running:
             try:
-                for wallet in self.whale_wallets:
-                    # Check recent transactions
-                    await asyncio.sleep(1)
+                if not self.whale_pubkeys:
+                    await asyncio.sleep(30)
+                    continue
                 
-                logger.debug(f"Monitored {len(self.whale_wallets)} whale wallets")
-                await asyncio.sleep(30)  # Check every 30 seconds
+                # Push-mode: whale transactions arrive as they are confirmed
+                await self._subscribe_logs(self.whale_pubkeys, self._handle_whale_logs)
                 
             except Exception as e:
                 logger.error(f"Error monitoring whales: {e}")
                 await asyncio.sleep(10)
     
+    async def _handle_whale_logs(self, pubkey: Pubkey, value):
+        """Dispatch a whale wallet transaction to the whale movement callback"""
+        if value.err is not None:
+            return
+        
+        await self._emit(self.on_whale_movement, {
+            "wallet": str(pubkey),
+            "signature": str(value.signature),
+            "logs": value.logs,
+            "timestamp": datetime.utcnow()
+        })
+    
+    async def report_token_alert(self, token: TokenLaunch, analysis: Dict):
+        """Hand an analyzed token to the alert callback"""
+        await self._emit(self.on_token_alert, token, analysis)
+    
     async def _update_stats(self):
         """Update monitoring statistics"""
         while self.is_running:
             try:
-                if self.stats["start_time"]:
-                    uptime = datetime.utcnow() - self.stats["start_time"]
-                    self.stats["uptime_seconds"] = int(uptime.total_seconds())
+                if self._start_ns is not None:
+                    self.stats["uptime_seconds"] = (time.monotonic_ns() - self._start_ns) // 1_000_000_000
                 
                 self.stats["tokens_monitored"] = len(self.monitored_tokens)
                 
@@ -176,9 +299,60 @@ class BlockchainMonitor:
             except Exception as e:
                 logger.error(f"Error updating stats: {e}")
     
-    async def get_stats(self) -> Dict:
-        """Get current monitoring statistics"""
-        return self.stats.copy()
+    def record_price(self, row: Dict):
+        """Buffer a price history row (token_id, price_usd, ...) for batched COPY"""
+        self._price_queue.put_nowait((
+            row["token_id"],
+            row["price_usd"],
+            row.get("volume_usd", 0.0),
+            row.get("liquidity_usd", 0.0),
+            row.get("market_cap_usd", 0.0),
+            row.get("timestamp") or datetime.utcnow()
+        ))
+    
+    async def _flush_price_history(self):
+        """Write buffered price rows every INSERT_MAX_WAIT_MS or INSERT_MAX_ROWS, until a None sentinel"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            row = await self._price_queue.get()
+            if row is None:
+                return
+            
+            rows = [row]
+            deadline = loop.time() + INSERT_MAX_WAIT_MS / 1000
+            
+            while len(rows) < INSERT_MAX_ROWS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._price_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                rows.append(row)
+            
+            await self._write_price_history(rows)
+    
+    async def _write_price_history(self, rows: List[Tuple]):
+        """Hand a batch of price rows to the price writer"""
+        if not rows:
+            return
+        if self.price_writer is None:
+            logger.debug(f"No price writer configured, dropping {len(rows)} price rows")
+            return
+        try:
+            await self.price_writer(rows)
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} price rows: {e}")
+    
+    async def get_stats(self) -> Mapping:
+        """Get a read-only view of current monitoring statistics"""
+        return MappingProxyType(self.stats)
     
     async def analyze_token(self, mint_address: str) -> Dict:
         """Analyze a specific token for risk factors"""
@@ -196,6 +370,15 @@ class BlockchainMonitor:
             "warnings": []
         }
         
+        try:
+            parse_pubkey(mint_address)
+        except ValueError as e:
+            # Never let garbage input fall through with the lowest-risk default
+            logger.warning(f"Invalid mint address {mint_address}: {e}")
+            analysis["risk_score"] = 100.0
+            analysis["error"] = f"Invalid mint address: {e}"
+            return analysis
+        
         try:
             # Perform various checks
             # 1. Check if contract is renounced
@@ -223,13 +406,30 @@ class BlockchainMonitor:
             logger.error(f"Error fetching price: {e}")
             return None
     
+    @property
+    def monitored_tokens(self) -> Mapping[str, TokenLaunch]:
+        """Current watchlist snapshot (read-only)"""
+        return self._monitored_tokens[0]
+    
+    @property
+    def watchlist_version(self) -> int:
+        """Incremented on every watchlist change"""
+        return self._monitored_tokens[1]
+    
     def add_token_to_watchlist(self, token_launch: TokenLaunch):
         """Add a token to the monitoring watchlist"""
-        self.monitored_tokens[token_launch.mint_address] = token_launch
+        tokens, version = self._monitored_tokens
+        self._monitored_tokens = ({**tokens, token_launch.mint_address: token_launch}, version + 1)
         logger.info(f"📌 Added {token_launch.symbol} to watchlist")
     
     def remove_token_from_watchlist(self, mint_address: str):
         """Remove a token from the monitoring watchlist"""
-        if mint_address in self.monitored_tokens:
-            del self.monitored_tokens[mint_address]
+        tokens, version = self._monitored_tokens
+        if mint_address in tokens:
+            remaining = {k: v for k, v in tokens.items() if k != mint_address}
+            self._monitored_tokens = (remaining, version + 1)
             logger.info(f"🗑️ Removed {mint_address} from watchlist")
+    
+    def mark_suspicious(self, mint_address: str):
+        """Flag a contract as suspicious"""
+        self.suspicious_contracts = self.suspicious_contracts | {mint_address}
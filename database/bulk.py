@@ -0,0 +1,76 @@
+"""
+Bulk Writes - Batched inserts for high-volume event tables
+Each helper issues one executemany INSERT for the whole batch
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.database import engine
+from database.models import Alert, HolderSnapshot, PriceHistory, Token
+
+# Column order of the tuples passed to bulk_copy_price_history
+PRICE_HISTORY_COPY_COLUMNS = [
+    "token_id", "price_usd", "volume_usd", "liquidity_usd", "market_cap_usd", "timestamp"
+]
+
+# Token columns an upsert may overwrite; identity and creator fields never change
+TOKEN_MUTABLE_FIELDS = frozenset({
+    "name", "symbol", "decimals", "total_supply",
+    "current_price_usd", "market_cap_usd", "liquidity_usd", "volume_24h_usd",
+    "risk_score", "is_honeypot", "is_verified", "is_suspicious",
+    "description", "website", "twitter", "telegram",
+})
+
+
+async def bulk_insert_alerts(session: AsyncSession, rows: List[Dict]):
+    """Insert many alerts in a single statement"""
+    if rows:
+        await session.execute(insert(Alert), rows)
+
+
+async def bulk_insert_price_history(session: AsyncSession, rows: List[Dict]):
+    """Insert many price history points in a single statement"""
+    if rows:
+        await session.execute(insert(PriceHistory), rows)
+
+
+async def bulk_copy_price_history(records: Sequence[Tuple]):
+    """
+    Load price history points with binary COPY, bypassing statement compilation
+    
+    Records are tuples in PRICE_HISTORY_COPY_COLUMNS order. COPY doesn't apply
+    column defaults, so every value (including timestamp) must be supplied.
+    """
+    if not records:
+        return
+    async with engine.begin() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "price_history", records=records, columns=PRICE_HISTORY_COPY_COLUMNS
+        )
+
+
+async def bulk_insert_holder_snapshots(session: AsyncSession, rows: List[Dict]):
+    """Insert many holder snapshots in a single statement"""
+    if rows:
+        await session.execute(insert(HolderSnapshot), rows)
+
+
+async def bulk_upsert_tokens(session: AsyncSession, rows: List[Dict]):
+    """Insert or update many tokens keyed on mint_address in a single statement"""
+    if not rows:
+        return
+    
+    # Only overwrite the columns the caller supplied, so omitted ones keep their values
+    fields = TOKEN_MUTABLE_FIELDS.intersection(*(row.keys() for row in rows))
+    
+    stmt = pg_insert(Token).values(rows)
+    update = {field: stmt.excluded[field] for field in fields}
+    update["last_updated"] = stmt.excluded.last_updated
+    
+    stmt = stmt.on_conflict_do_update(index_elements=["mint_address"], set_=update)
+    await session.execute(stmt)
@@ -0,0 +1,83 @@
+"""
+CTE Operations - Merged writes for the hot alert path
+Several INSERT/UPDATE statements are chained in one WITH query so they cost one round trip
+"""
+
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import AlertSeverity, AlertType, IntEnumType
+
+# Data-modifying CTEs always run, even when the final SELECT doesn't reference them.
+# COALESCE keeps the current market value when the caller doesn't supply one.
+RECORD_ALERT_AND_PRICE = text("""
+WITH u AS (
+    UPDATE tokens SET
+        current_price_usd = COALESCE(:current_price_usd, current_price_usd),
+        market_cap_usd = COALESCE(:market_cap_usd, market_cap_usd),
+        liquidity_usd = COALESCE(:liquidity_usd, liquidity_usd),
+        volume_24h_usd = COALESCE(:volume_24h_usd, volume_24h_usd),
+        last_updated = now() AT TIME ZONE 'utc'
+    WHERE id = :token_id
+), a AS (
+    INSERT INTO alerts (
+        token_id, alert_type, severity, title, message,
+        is_sent, is_resolved, retweets, likes, created_at
+    )
+    VALUES (
+        :token_id, :alert_type, :severity, :title, :message,
+        false, false, 0, 0, now() AT TIME ZONE 'utc'
+    )
+    RETURNING id
+), p AS (
+    INSERT INTO price_history (
+        token_id, price_usd, volume_usd, liquidity_usd, market_cap_usd, timestamp
+    )
+    VALUES (
+        :token_id, :price_usd, :price_volume_usd, :price_liquidity_usd,
+        :price_market_cap_usd, now() AT TIME ZONE 'utc'
+    )
+)
+SELECT id FROM a
+""").bindparams(
+    bindparam("alert_type", type_=IntEnumType(AlertType)),
+    bindparam("severity", type_=IntEnumType(AlertSeverity))
+)
+
+
+async def record_alert_and_price(session: AsyncSession,
+                                 token_update: Dict,
+                                 alert_row: Dict,
+                                 price_row: Dict) -> Optional[int]:
+    """
+    Update a token's market data, insert an alert and a price point in one statement
+    
+    Args:
+        token_update: "id" plus any of current_price_usd, market_cap_usd,
+                      liquidity_usd, volume_24h_usd
+        alert_row: alert_type, severity (AlertType/AlertSeverity or their names), title, message
+        price_row: price_usd plus optional volume_usd, liquidity_usd, market_cap_usd
+    
+    Returns:
+        The new alert id
+    """
+    params = {
+        "token_id": token_update["id"],
+        "current_price_usd": token_update.get("current_price_usd"),
+        "market_cap_usd": token_update.get("market_cap_usd"),
+        "liquidity_usd": token_update.get("liquidity_usd"),
+        "volume_24h_usd": token_update.get("volume_24h_usd"),
+        "alert_type": alert_row["alert_type"],
+        "severity": alert_row.get("severity"),
+        "title": alert_row.get("title"),
+        "message": alert_row.get("message"),
+        "price_usd": price_row["price_usd"],
+        "price_volume_usd": price_row.get("volume_usd", 0.0),
+        "price_liquidity_usd": price_row.get("liquidity_usd", 0.0),
+        "price_market_cap_usd": price_row.get("market_cap_usd", 0.0),
+    }
+    
+    result = await session.execute(RECORD_ALERT_AND_PRICE, params)
+    return result.scalar_one_or_none()
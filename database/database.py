@@ -2,43 +2,102 @@
 Database Connection and Session Management
 """
 
+import asyncio
 import logging
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+
+import orjson
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from config import settings
 from database.models import Base
+from database.partitions import ensure_monthly_partitions
 
 logger = logging.getLogger(__name__)
 
+# How often long-running processes roll monthly partitions forward
+PARTITION_MAINTENANCE_INTERVAL = 86400
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
     echo=settings.DEBUG,
+    poolclass=AsyncAdaptedQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True
+    pool_timeout=30,
+    pool_recycle=1800,  # Recycle before server/proxy idle timeouts
+    pool_pre_ping=True,
+    query_cache_size=2048,  # SQLAlchemy compiled-statement cache
+    # The asyncpg dialect registers its json/jsonb codecs with these
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    connect_args={
+        # asyncpg prepared statement caches, so repeat queries skip parse/plan
+        "statement_cache_size": 1024,
+        "prepared_statement_cache_size": 1024,
+        # JIT compilation costs more than it saves on short OLTP queries
+        "server_settings": {"jit": "off"},
+    }
 )
 
 # Create async session factory
-AsyncSessionLocal = sessionmaker(
+# No autoflush: writes go out on explicit flush/commit, not before every query
+AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
-    expire_on_commit=False
+    expire_on_commit=False,
+    autoflush=False
+)
+
+# Same pool, but no BEGIN/COMMIT round trips for read-only requests
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    expire_on_commit=False,
+    autoflush=False
 )
 
 
 async def init_db():
-    """Initialize database tables"""
-    logger.info("Creating database tables...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("✅ Database tables created")
+    """Initialize database tables (outside production only) and upcoming partitions"""
+    # Production schema is owned by Alembic migrations (`alembic upgrade head`
+    # at deploy time), so boots skip create_all's per-table catalog checks.
+    # DATABASE_CREATE_ALL opts back in for stacks without migrations.
+    if settings.ENVIRONMENT == "production" and not settings.DATABASE_CREATE_ALL:
+        logger.info("Skipping create_all in production; schema is managed by migrations")
+    else:
+        logger.info("Creating database tables...")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("✅ Database tables created")
+    
+    # Monthly partitions roll forward on every boot, migrations or not
+    async with AsyncSessionLocal() as session:
+        await ensure_monthly_partitions(session)
+        await session.commit()
 
 
-async def get_db() -> AsyncSession:
-    """Dependency for getting async database session"""
+async def maintain_partitions():
+    """Keep monthly partitions created ahead of time for as long as the process runs"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await ensure_monthly_partitions(session)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error maintaining partitions: {e}")
+        
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+
+
+async def get_db_read() -> AsyncSession:
+    """Dependency for a read-only (autocommit) database session"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+async def get_db_write() -> AsyncSession:
+    """Dependency for a transactional database session, committed on success"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -50,6 +109,16 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_db() -> AsyncSession:
+    """Dependency for a database session; callers that write commit explicitly"""
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
 async def close_db():
     """Close database connections"""
     await engine.dispose()
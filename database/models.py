@@ -3,15 +3,67 @@ Database Models - SQLAlchemy ORM models for data persistence
 Stores token data, alerts, user preferences, and analytics
 """
 
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from enum import IntEnum
+from typing import List, Optional, Type
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, Boolean, DateTime, ForeignKey, Text, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
 
+def utc_now():
+    """Server-side UTC timestamp for naive DateTime columns"""
+    return func.timezone("utc", func.now())
+
+
+class AlertType(IntEnum):
+    """Kind of alert"""
+    LAUNCH = 1
+    RUG = 2
+    WHALE = 3
+    PRICE = 4
+
+
+class AlertSeverity(IntEnum):
+    """Alert severity"""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+class RiskTolerance(IntEnum):
+    """User risk appetite"""
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+class IntEnumType(TypeDecorator):
+    """Stores an IntEnum as a SMALLINT; also accepts member names like 'launch'"""
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class: Type[IntEnum], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return int(self.enum_class[value.upper()])
+        return int(self.enum_class(value))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.enum_class(value)
+
+
 class Token(Base):
     """Token information and tracking"""
     __tablename__ = "tokens"
@@ -25,7 +77,7 @@ class Token(Base):
     
     # Creator info
     creator_address = Column(String(44), index=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utc_now())
     
     # Market data
     current_price_usd = Column(Float, default=0.0)
@@ -46,14 +98,23 @@ class Token(Base):
     telegram = Column(String(255))
     
     # Relationships
-    alerts = relationship("Alert", back_populates="token")
-    price_history = relationship("PriceHistory", back_populates="token")
-    holder_snapshots = relationship("HolderSnapshot", back_populates="token")
+    alerts = relationship("Alert", back_populates="token", lazy="raise_on_sql")
+    price_history = relationship("PriceHistory", back_populates="token", lazy="raise_on_sql")
+    holder_snapshots = relationship("HolderSnapshot", back_populates="token", lazy="raise_on_sql")
     
     # Timestamps
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = Column(DateTime, server_default=utc_now(), onupdate=utc_now())
+    
+    __table_args__ = (
+        # Partial indexes: only flagged tokens are indexed
+        Index("ix_tokens_suspicious", "is_suspicious", postgresql_where=text("is_suspicious")),
+        Index("ix_tokens_honeypot", "is_honeypot", postgresql_where=text("is_honeypot")),
+    )
     
     def __repr__(self):
+        return f"<Token {self.id}>"
+    
+    def __str__(self):
         return f"<Token {self.symbol} ({self.mint_address[:8]}...)>"
 
 
@@ -61,16 +122,17 @@ class Alert(Base):
     """Trading alerts and notifications"""
     __tablename__ = "alerts"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by created_at, so the primary key must include it
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     token_id = Column(Integer, ForeignKey("tokens.id"), nullable=False)
     
-    alert_type = Column(String(50), nullable=False)  # 'launch', 'rug', 'whale', 'price'
-    severity = Column(String(20))  # 'low', 'medium', 'high', 'critical'
+    alert_type = Column(IntEnumType(AlertType), nullable=False)
+    severity = Column(IntEnumType(AlertSeverity))
     title = Column(String(200))
     message = Column(Text)
     
     # Alert metadata
-    data = Column(JSON)  # Additional structured data
+    data = Column(JSONB)  # Additional structured data
     
     # Status
     is_sent = Column(Boolean, default=False)
@@ -83,13 +145,23 @@ class Alert(Base):
     likes = Column(Integer, default=0)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, primary_key=True, server_default=utc_now(), index=True)
     
     # Relationships
-    token = relationship("Token", back_populates="alerts")
+    token = relationship("Token", back_populates="alerts", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Recent alerts for a token
+        Index("ix_alerts_token_created", "token_id", created_at.desc()),
+        # Monthly partitions, see database/partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     def __repr__(self):
-        return f"<Alert {self.alert_type} - {self.title}>"
+        return f"<Alert {self.id}>"
+    
+    def __str__(self):
+        return f"<Alert {getattr(self.alert_type, 'name', self.alert_type)} - {self.title}>"
 
 
 class User(Base):
@@ -101,9 +173,9 @@ class User(Base):
     twitter_id = Column(String(50), unique=True)
     
     # Preferences
-    alert_preferences = Column(JSON)  # Custom alert settings
-    watchlist = Column(JSON)  # List of tokens being watched
-    risk_tolerance = Column(String(20), default="medium")  # 'low', 'medium', 'high'
+    alert_preferences = Column(JSONB)  # Custom alert settings
+    watchlist = Column(JSONB)  # List of tokens being watched
+    risk_tolerance = Column(IntEnumType(RiskTolerance), default=RiskTolerance.MEDIUM)
     
     # Subscription
     is_premium = Column(Boolean, default=False)
@@ -115,13 +187,21 @@ class User(Base):
     failed_trades = Column(Integer, default=0)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_active = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utc_now())
+    last_active = Column(DateTime, server_default=utc_now())
     
     # Relationships
-    portfolios = relationship("Portfolio", back_populates="user")
+    portfolios = relationship("Portfolio", back_populates="user", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Serves containment lookups like watchlist @> '[token_id]'
+        Index("ix_user_watchlist_gin", "watchlist", postgresql_using="gin"),
+    )
     
     def __repr__(self):
+        return f"<User {self.id}>"
+    
+    def __str__(self):
         return f"<User @{self.twitter_username}>"
 
 
@@ -135,7 +215,7 @@ class Portfolio(Base):
     wallet_address = Column(String(44), index=True)
     
     # Holdings
-    holdings = Column(JSON)  # List of tokens and amounts
+    holdings = Column(JSONB)  # List of tokens and amounts
     total_value_usd = Column(Float, default=0.0)
     
     # Performance
@@ -144,13 +224,16 @@ class Portfolio(Base):
     profit_loss_pct = Column(Float, default=0.0)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utc_now())
+    last_updated = Column(DateTime, server_default=utc_now(), onupdate=utc_now())
     
     # Relationships
-    user = relationship("User", back_populates="portfolios")
+    user = relationship("User", back_populates="portfolios", lazy="raise_on_sql")
     
     def __repr__(self):
+        return f"<Portfolio {self.id}>"
+    
+    def __str__(self):
         return f"<Portfolio {self.wallet_address[:8]}... - ${self.total_value_usd:,.2f}>"
 
 
@@ -158,7 +241,8 @@ class PriceHistory(Base):
     """Historical price data for tokens"""
     __tablename__ = "price_history"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by timestamp, so the primary key must include it
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     token_id = Column(Integer, ForeignKey("tokens.id"), nullable=False)
     
     price_usd = Column(Float, nullable=False)
@@ -166,12 +250,21 @@ class PriceHistory(Base):
     liquidity_usd = Column(Float, default=0.0)
     market_cap_usd = Column(Float, default=0.0)
     
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, primary_key=True, server_default=utc_now(), index=True)
     
     # Relationships
-    token = relationship("Token", back_populates="price_history")
+    token = relationship("Token", back_populates="price_history", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        Index("ix_price_token_ts", "token_id", "timestamp"),
+        # Monthly partitions, see database/partitions.py
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
     
     def __repr__(self):
+        return f"<PriceHistory {self.id}>"
+    
+    def __str__(self):
         return f"<PriceHistory ${self.price_usd} at {self.timestamp}>"
 
 
@@ -187,14 +280,21 @@ class HolderSnapshot(Base):
     dev_holdings_pct = Column(Float, default=0.0)
     
     # Distribution data
-    holder_distribution = Column(JSON)  # Full holder list if needed
+    holder_distribution = Column(JSONB)  # Full holder list if needed
     
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, server_default=utc_now(), index=True)
     
     # Relationships
-    token = relationship("Token", back_populates="holder_snapshots")
+    token = relationship("Token", back_populates="holder_snapshots", lazy="raise_on_sql")
+    
+    __table_args__ = (
+        Index("ix_holder_token_ts", "token_id", "timestamp"),
+    )
     
     def __repr__(self):
+        return f"<HolderSnapshot {self.id}>"
+    
+    def __str__(self):
         return f"<HolderSnapshot {self.total_holders} holders>"
 
 
@@ -227,4 +327,7 @@ class MarketStats(Base):
     false_positives = Column(Integer, default=0)
     
     def __repr__(self):
+        return f"<MarketStats {self.id}>"
+    
+    def __str__(self):
         return f"<MarketStats {self.date.date()}>"
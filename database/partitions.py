@@ -0,0 +1,88 @@
+"""
+Table Partitions - Monthly range partitions for time-series tables
+price_history and alerts are partitioned by month; each month needs its table created ahead of time,
+and a DEFAULT partition catches rows outside every month (e.g. back-dated timestamps)
+"""
+
+import logging
+from datetime import date, datetime
+from typing import Dict, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> column it is ranged on
+PARTITIONED_TABLES: Dict[str, str] = {
+    "price_history": "timestamp",
+    "alerts": "created_at",
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    """First day of the month `months` after day's month"""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def _partitioned_parents(session: AsyncSession) -> Set[str]:
+    """Configured tables that exist and are actually partitioned"""
+    result = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = ANY(:names) AND pg_table_is_visible(c.oid)"
+        ),
+        {"names": list(PARTITIONED_TABLES)}
+    )
+    return set(result.scalars())
+
+
+async def _create_partition(session: AsyncSession, partition: str, ddl: str):
+    """Run one partition's DDL in a savepoint, so a failure doesn't abort the others"""
+    try:
+        async with session.begin_nested():
+            await session.execute(text(ddl))
+    except Exception as e:
+        # Typically DEFAULT already holds rows for a new month
+        logger.error(f"Error creating partition {partition}: {e}")
+
+
+async def ensure_monthly_partitions(session: AsyncSession, months_ahead: int = 2):
+    """
+    Create the DEFAULT partitions, the current month's and the next months_ahead ones if missing
+    
+    Runs at boot and then daily (database.maintain_partitions), so months are created
+    well before they start and only stray rows ever land in DEFAULT. Tables that are
+    missing or were created unpartitioned are skipped.
+    """
+    tables = await _partitioned_parents(session)
+    for table in PARTITIONED_TABLES.keys() - tables:
+        logger.warning(f"⚠️ {table} is missing or not partitioned, skipping partition maintenance")
+    if not tables:
+        return
+    
+    this_month = datetime.utcnow().date().replace(day=1)
+    
+    for table in tables:
+        await _create_partition(
+            session,
+            f"{table}_default",
+            f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+        )
+    
+    for offset in range(months_ahead + 1):
+        start = _add_months(this_month, offset)
+        end = _add_months(this_month, offset + 1)
+        
+        for table in tables:
+            partition = f"{table}_{start:%Y_%m}"
+            await _create_partition(
+                session,
+                partition,
+                f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+    
+    logger.info(f"✅ Monthly partitions ensured through {_add_months(this_month, months_ahead):%Y-%m}")
@@ -0,0 +1,53 @@
+"""
+Database Queries - Reusable query helpers
+Relationships are lazy="raise_on_sql", so related rows must be eager-loaded here
+"""
+
+from typing import List, Sequence
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+
+from database.models import Token
+
+
+async def load_tokens_with_alerts(session: AsyncSession, ids: Sequence[int]) -> List[Token]:
+    """Load tokens with their alerts and price history in one query per relationship"""
+    result = await session.execute(
+        select(Token)
+        .options(selectinload(Token.alerts), selectinload(Token.price_history))
+        .where(Token.id.in_(ids))
+    )
+    return list(result.scalars().all())
+
+
+def token_summary_query() -> Select:
+    """Select Token objects with only the columns list endpoints show"""
+    return select(Token).options(
+        load_only(
+            Token.id,
+            Token.symbol,
+            Token.mint_address,
+            Token.current_price_usd,
+            Token.risk_score,
+            Token.market_cap_usd
+        )
+    )
+
+
+async def list_token_summaries(session: AsyncSession, limit: int = 50) -> List[Row]:
+    """Read-only token summaries as plain rows, skipping ORM identity bookkeeping"""
+    result = await session.execute(
+        select(
+            Token.id,
+            Token.symbol,
+            Token.mint_address,
+            Token.current_price_usd,
+            Token.risk_score,
+            Token.market_cap_usd
+        )
+        .order_by(Token.market_cap_usd.desc())
+        .limit(limit)
+    )
+    return list(result.all())
@@ -5,7 +5,9 @@ Starts all services: API, Blockchain Monitor, Twitter Bot
 """
 
 import asyncio
+import contextlib
 import logging
+import logging.config
 import signal
 import sys
 from typing import Optional
@@ -14,8 +16,10 @@ from api.main import app
 from blockchain.monitor import BlockchainMonitor
 from twitter.bot import SolyTwitterBot
 from ai.analyzer import TokenAnalyzer
+from ai.cache import LLMCache
 from config import settings, LOGGING_CONFIG
-from database.database import init_db
+from database.bulk import bulk_copy_price_history
+from database.database import init_db, close_db, maintain_partitions
 
 # Configure logging
 logging.config.dictConfig(LOGGING_CONFIG)
@@ -43,15 +47,21 @@ async def initialize_services():
             logger.info("🤖 Initializing AI Analyzer...")
             token_analyzer = TokenAnalyzer(
                 openai_api_key=settings.OPENAI_API_KEY,
-                model=settings.AI_MODEL
+                model=settings.AI_MODEL,
+                fast_model=settings.AI_MODEL_FAST,
+                cache=LLMCache(settings.REDIS_URL, ttl=settings.REDIS_CACHE_TTL),
+                max_requests_per_minute=settings.OPENAI_MAX_REQUESTS_PER_MINUTE,
+                max_tokens_per_minute=settings.OPENAI_MAX_TOKENS_PER_MINUTE
             )
+            await token_analyzer.load_tokenizers()
         
         # Initialize Blockchain Monitor
         if settings.ENABLE_BLOCKCHAIN_MONITOR:
             logger.info("🔍 Initializing Blockchain Monitor...")
             blockchain_monitor = BlockchainMonitor(
                 rpc_url=settings.SOLANA_RPC_URL,
-                websocket_url=settings.SOLANA_WS_URL
+                websocket_url=settings.SOLANA_WS_URL,
+                price_writer=bulk_copy_price_history
             )
             await blockchain_monitor.start()
         
@@ -71,10 +81,10 @@ async def initialize_services():
         
         logger.info("✅ All services initialized successfully!")
         logger.info("=" * 60)
-        logger.info(f"🎯 Soly v{settings.APP_VERSION} is now running!")
-        logger.info(f"🌐 Environment: {settings.ENVIRONMENT}")
-        logger.info(f"📡 API Server: http://{settings.API_HOST}:{settings.API_PORT}")
-        logger.info(f"📚 API Docs: http://{settings.API_HOST}:{settings.API_PORT}/docs")
+        logger.info("🎯 Soly v%s is now running!", settings.APP_VERSION)
+        logger.info("🌐 Environment: %s", settings.ENVIRONMENT)
+        logger.info("📡 API Server: http://%s:%s", settings.API_HOST, settings.API_PORT)
+        logger.info("📚 API Docs: http://%s:%s/docs", settings.API_HOST, settings.API_PORT)
         logger.info("=" * 60)
         
     except Exception as e:
@@ -95,17 +105,20 @@ async def shutdown_services():
             logger.info("Stopping blockchain monitor...")
             await blockchain_monitor.stop()
         
+        if token_analyzer:
+            logger.info("Closing AI analyzer...")
+            await token_analyzer.aclose()
+        
         logger.info("✅ All services stopped successfully")
         
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
 
-def signal_handler(sig, frame):
+def _request_shutdown(sig: signal.Signals, stop_event: asyncio.Event):
     """Handle shutdown signals"""
-    logger.info(f"Received signal {sig}, initiating shutdown...")
-    asyncio.create_task(shutdown_services())
-    sys.exit(0)
+    logger.info("Received signal %s, initiating shutdown...", sig.name)
+    stop_event.set()
 
 
 async def run_health_check():
@@ -114,7 +127,10 @@ async def run_health_check():
         try:
             await asyncio.sleep(60)  # Check every minute
             
-            # Check service health
+            # Check service health (nothing to do if warnings are filtered out)
+            if not logger.isEnabledFor(logging.WARNING):
+                continue
+            
             if blockchain_monitor and not blockchain_monitor.is_running:
                 logger.warning("⚠️ Blockchain monitor is not running!")
             
@@ -124,30 +140,38 @@ async def run_health_check():
         except asyncio.CancelledError:
             break
         except Exception as e:
-            logger.error(f"Health check error: {e}")
+            logger.error("Health check error: %s", e)
 
 
 async def main():
     """Main application entry point"""
     try:
-        # Register signal handlers
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        # Signals are handled on the loop itself; they just end the wait below
+        loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, _request_shutdown, sig, stop_event)
         
         # Initialize services
         await initialize_services()
         
-        # Start health check task
+        # Start health check and partition maintenance tasks
         health_check_task = asyncio.create_task(run_health_check())
+        partition_task = asyncio.create_task(maintain_partitions())
         
-        # Keep running
+        # Keep running until a shutdown signal arrives
         try:
-            await asyncio.Event().wait()
+            await stop_event.wait()
         except KeyboardInterrupt:
             logger.info("Received keyboard interrupt")
         finally:
             health_check_task.cancel()
+            partition_task.cancel()
+            # Let partition DDL unwind before the engine goes away
+            with contextlib.suppress(asyncio.CancelledError):
+                await partition_task
             await shutdown_services()
+            await close_db()
             
     except Exception as e:
         logger.error(f"Fatal error: {e}")
@@ -166,6 +190,13 @@ if __name__ == "__main__":
     ╚═══════════════════════════════════════════╝
     """)
     
+    # libuv event loop for faster socket I/O across all services, if available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -0,0 +1,75 @@
+"""
+Tests for Utility Helpers
+"""
+
+import numpy as np
+
+from utils.helpers import (
+    _HOUR_STATUS,
+    calculate_liquidity_health,
+    calculate_risk_score,
+    calculate_risk_scores,
+    format_large_number,
+    get_risk_emoji,
+    get_trend_emoji,
+)
+
+
+def test_calculate_risk_score_safe_token():
+    """Test a token with every safety signal scores zero"""
+    factors = {
+        "mint_authority_revoked": True,
+        "freeze_authority_revoked": True,
+        "holder_count": 500,
+        "top_10_holdings_pct": 30,
+        "dev_holdings_pct": 5,
+        "liquidity_locked": True,
+        "liquidity_usd": 50000
+    }
+    
+    assert calculate_risk_score(factors) == 0.0
+
+
+def test_calculate_risk_score_missing_factors_capped():
+    """Test missing factors count as risky and the score is capped"""
+    assert calculate_risk_score({}) == 95.0
+    assert calculate_risk_score({"top_10_holdings_pct": 90, "dev_holdings_pct": 50}) == 100.0
+    assert calculate_risk_score({"mint_authority_revoked": True, "liquidity_locked": True}) == 45.0
+
+
+def test_calculate_risk_scores_matches_scalar():
+    """Test the batch version agrees with per-token scoring"""
+    tokens = [
+        {"holder_count": 75, "top_10_holdings_pct": 65, "dev_holdings_pct": 15,
+         "mint_authority_revoked": True, "freeze_authority_revoked": True,
+         "liquidity_locked": True, "liquidity_usd": 10000},
+        {"holder_count": 40, "top_10_holdings_pct": 85, "dev_holdings_pct": 25,
+         "mint_authority_revoked": True, "freeze_authority_revoked": False,
+         "liquidity_locked": True, "liquidity_usd": 1000},
+        {"holder_count": 100, "top_10_holdings_pct": 40, "dev_holdings_pct": 10,
+         "mint_authority_revoked": True, "freeze_authority_revoked": True,
+         "liquidity_locked": True, "liquidity_usd": 5000},
+    ]
+    arrays = {name: np.array([t[name] for t in tokens]) for name in tokens[0]}
+    
+    scores = calculate_risk_scores(arrays)
+    
+    assert scores.tolist() == [calculate_risk_score(t) for t in tokens]
+    assert scores.tolist() == [35.0, 80.0, 0.0]
+
+
+def test_bucket_lookups_at_boundaries():
+    """Test table lookups put threshold values in the right bucket"""
+    assert [get_risk_emoji(s) for s in (29.9, 30, 69.9, 70)] == ["🟢", "🟡", "🟡", "🔴"]
+    assert [get_trend_emoji(p) for p in (-10, -5, 0, 10, 11)] == ["📉💥", "📉", "📉", "📈", "📈🚀"]
+    assert [calculate_liquidity_health(r, 1) for r in (0.4, 0.5, 1.0, 2.0)] == ["Poor", "Fair", "Good", "Excellent"]
+    assert calculate_liquidity_health(100, 0) == "Unknown"
+    assert [format_large_number(n) for n in (999, 1_000, 2_500_000, 3e9)] == ["$999.00", "$1.00K", "$2.50M", "$3.00B"]
+
+
+def test_market_hours_status_table():
+    """Test the per-hour market status table"""
+    assert len(_HOUR_STATUS) == 24
+    assert _HOUR_STATUS[0] == _HOUR_STATUS[8] == "asian"
+    assert _HOUR_STATUS[13] == _HOUR_STATUS[21] == "peak"
+    assert _HOUR_STATUS[9] == _HOUR_STATUS[12] == _HOUR_STATUS[22] == "normal"
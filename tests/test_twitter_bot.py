@@ -0,0 +1,151 @@
+"""
+Tests for Twitter Bot Module
+"""
+
+import pytest
+import pytest_asyncio
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+from twitter.bot import SolyTwitterBot
+
+_real_sleep = asyncio.sleep
+
+
+class FakeClock:
+    """Monotonic clock that only moves when a test advances it"""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        """Stand-in for asyncio.sleep: wakes once the clock passes the deadline"""
+        wakeup = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + delay, wakeup))
+        await wakeup
+
+    async def advance(self, seconds: float):
+        """Move time forward, wake due sleepers and let them run"""
+        self.now += seconds
+        for deadline, wakeup in list(self._sleepers):
+            if deadline <= self.now:
+                self._sleepers.remove((deadline, wakeup))
+                if not wakeup.done():
+                    wakeup.set_result(None)
+        await settle()
+
+
+async def settle():
+    """Let every ready task run until it blocks again"""
+    for _ in range(20):
+        await _real_sleep(0)
+
+
+@pytest.fixture
+def bot():
+    """Create a test bot"""
+    bot = SolyTwitterBot(
+        api_key="test_key",
+        api_secret="test_secret",
+        access_token="test_token",
+        access_token_secret="test_token_secret",
+        bearer_token="test_bearer"
+    )
+    bot.is_running = True
+    return bot
+
+
+@pytest.fixture
+def clock():
+    """Drive the bot's monotonic time and sleeps from the test"""
+    clock = FakeClock()
+    with patch("twitter.bot.time", SimpleNamespace(monotonic=clock.monotonic)), \
+            patch("twitter.bot.asyncio.sleep", clock.sleep):
+        yield clock
+
+
+@pytest_asyncio.fixture
+async def drainer(bot, clock):
+    """Run the queue drainer, stopped after the test"""
+    task = asyncio.create_task(bot._drain_tweet_queue())
+    await settle()
+    yield task
+    bot.is_running = False
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def _posted(mock_create):
+    return [call.kwargs["text"] for call in mock_create.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_failed_send_frees_slot_once(bot, clock, drainer):
+    """Test that a slow failed send releases its slot exactly once"""
+    interval = bot._min_interval_s
+
+    async def slow_failure(**kwargs):
+        await clock.sleep(5 * interval)  # Several drainer intervals
+        raise Exception("API Error")
+
+    with patch.object(bot.client, 'create_tweet', side_effect=slow_failure):
+        post = asyncio.create_task(bot.post_tweet("gm"))
+        await settle()
+        assert bot._post_sem.locked()
+
+        for _ in range(5):
+            await clock.advance(interval)
+        posted = await post
+
+    assert posted is False
+    assert not bot._post_sem.locked()
+    assert not drainer.done()
+
+
+@pytest.mark.asyncio
+async def test_slot_refills_only_after_interval(bot, clock, drainer):
+    """Test that a tweet right after a send is queued, then drained one interval later"""
+    interval = bot._min_interval_s
+
+    with patch.object(bot.client, 'create_tweet', new_callable=AsyncMock) as mock_create:
+        assert await bot.post_tweet("first") is True
+        assert await bot.post_tweet("second") is False
+        assert len(bot.tweet_queue) == 1
+
+        await clock.advance(interval / 2)
+        assert _posted(mock_create) == ["first"]
+
+        await clock.advance(interval / 2)
+        assert _posted(mock_create) == ["first", "second"]
+
+    assert not bot.tweet_queue
+    assert bot.tweets_today == 2
+    assert bot._post_sem.locked()  # The drained tweet holds the slot
+
+
+@pytest.mark.asyncio
+async def test_mention_replies_respect_daily_limit(bot):
+    """Test that concurrent mention replies stop at the daily tweet limit"""
+    bot.max_tweets_per_day = 3
+    sent = asyncio.Event()
+
+    async def blocked_send(**kwargs):
+        await sent.wait()
+
+    with patch.object(bot.client, 'create_tweet', new_callable=AsyncMock) as mock_create:
+        mock_create.side_effect = blocked_send
+        replies = asyncio.create_task(bot._reply_to_mentions([(i, "reply") for i in range(5)]))
+        await settle()
+
+        # Sends still in flight count toward the limit
+        assert mock_create.call_count == 3
+        sent.set()
+        results = await replies
+
+    assert results.count(True) == 3
+    assert mock_create.call_count == 3
+    assert bot.tweets_today == 3
@@ -5,16 +5,56 @@ Posts updates, responds to mentions, and engages with the community
 
 import logging
 import asyncio
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
+import heapq
+import random
+import time
+from collections import deque
+from typing import Deque, List, Optional, Dict, Tuple
+from datetime import datetime, timedelta, timezone
+import aiohttp
 import tweepy
 from tweepy.asynchronous import AsyncClient
 
 from ai.analyzer import TokenAnalyzer
 from blockchain.monitor import BlockchainMonitor, TokenLaunch
+from utils.helpers import get_risk_emoji
 
 logger = logging.getLogger(__name__)
 
+# (UTC hour, update type); each fires daily
+SCHEDULE: Tuple[Tuple[int, str], ...] = (
+    (8, "morning_update"),
+    (12, "midday_alert"),
+    (18, "evening_recap")
+)
+
+# Tweet templates, filled with str.format; no surrounding whitespace to strip
+MORNING_UPDATE_TEMPLATE = (
+    "☀️ GM Trenchers!\n\n"
+    "🔍 Monitoring {tokens_monitored} tokens today\n"
+    "📊 Market sentiment: Looking stable\n"
+    "⚠️ Stay alert for new launches\n\n"
+    "Remember: DYOR, take profits, and never ape blindly! \n\n"
+    "#Solana #CryptoTrading #TrenchLife"
+)
+
+MIDDAY_ALERT_TEMPLATE = (
+    "🔔 Midday Update\n\n"
+    "💡 Trading Tip: {tip}\n\n"
+    "Stay disciplined, stick to your strategy!\n\n"
+    "#SolanaTips #CryptoTrading"
+)
+
+TOKEN_ALERT_TEMPLATE = (
+    "{risk_emoji} New Token Alert!\n\n"
+    "${symbol} just launched\n"
+    "Risk Score: {risk_score}/100\n\n"
+    "{red_flags}"
+    "DYOR before aping! 🔬\n\n"
+    "#Solana #NewToken"
+)
+RED_FLAGS_TEMPLATE = "⚠️ Red Flags: {}\n\n"
+
 
 class SolyTwitterBot:
     """Autonomous Twitter bot for Soly"""
@@ -36,13 +76,33 @@ class SolyTwitterBot:
         )
         
         self.is_running = False
-        self.last_tweet_time: Optional[datetime] = None
-        self.tweet_queue: List[str] = []
+        self._tasks: List[asyncio.Task] = []
+        self._schedule_heap: List[Tuple[float, str]] = []
+        
+        # Shared keep-alive session for all Twitter calls, opened in start()
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.last_tweet_monotonic: Optional[float] = None
         
         # Rate limiting
         self.tweets_today = 0
         self.max_tweets_per_day = 50
         self.min_tweet_interval_minutes = 15
+        self._min_interval_s = self.min_tweet_interval_minutes * 60
+        
+        # Token bucket of one posting slot, refilled by _drain_tweet_queue once
+        # per interval; tweets that miss the slot wait in a bounded queue.
+        # _send_lock is held while a send owns the slot, so the drainer never
+        # refills it mid-send
+        self._post_sem = asyncio.BoundedSemaphore(1)
+        self._send_lock = asyncio.Lock()
+        self.tweet_queue: Deque[Tuple[str, Optional[int]]] = deque(maxlen=200)
+        
+        # Caps concurrent mention replies so a burst can't exhaust the API rate limit
+        self._mention_sem = asyncio.Semaphore(5)
+        self._replies_in_flight = 0
+        
+        # Token alerts waiting to be posted, fed by the blockchain monitor
+        self.alert_queue: asyncio.Queue = asyncio.Queue()
         
         logger.info("🐦 Twitter bot initialized")
     
@@ -54,35 +114,74 @@ class SolyTwitterBot:
         self.ai_analyzer = ai_analyzer
         self.is_running = True
         
+        # Without a session tweepy opens (and closes) a new one per request
+        self._http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=75)
+        )
+        self.client.session = self._http
+        
+        # Alerts are pushed to us as soon as the monitor has them
+        blockchain_monitor.on_token_alert = self.enqueue_alert
+        
         # Start bot tasks
-        asyncio.create_task(self._post_scheduled_updates())
-        asyncio.create_task(self._monitor_mentions())
-        asyncio.create_task(self._post_alerts())
-        asyncio.create_task(self._engage_with_community())
+        self._tasks = [
+            asyncio.create_task(self._post_scheduled_updates()),
+            asyncio.create_task(self._monitor_mentions()),
+            asyncio.create_task(self._post_alerts()),
+            asyncio.create_task(self._engage_with_community()),
+            asyncio.create_task(self._drain_tweet_queue()),
+            asyncio.create_task(self._reset_daily_count())
+        ]
         
         logger.info("✅ Twitter bot started")
     
     async def stop(self):
         """Stop the Twitter bot"""
         self.is_running = False
+        
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+            self.client.session = None
+        
         logger.info("🛑 Twitter bot stopped")
     
+    def enqueue_alert(self, token: TokenLaunch, analysis: Dict):
+        """Queue a token alert for immediate posting"""
+        self.alert_queue.put_nowait((token, analysis))
+    
     async def post_tweet(self, text: str, reply_to: Optional[int] = None) -> bool:
-        """Post a tweet"""
-        try:
-            # Check rate limits
-            if self.tweets_today >= self.max_tweets_per_day:
-                logger.warning("Daily tweet limit reached")
+        """Post a tweet now if the posting slot is free, otherwise queue it"""
+        # Check rate limits
+        if self.tweets_today >= self.max_tweets_per_day:
+            logger.warning("Daily tweet limit reached")
+            return False
+        
+        async with self._send_lock:
+            # A taken slot means we posted within the interval
+            if self._post_sem.locked():
+                logger.debug("Tweet interval too short, queueing...")
+                if len(self.tweet_queue) == self.tweet_queue.maxlen:
+                    logger.warning(f"⚠️ Tweet queue full ({self.tweet_queue.maxlen}), dropping oldest queued tweet")
+                self.tweet_queue.append((text, reply_to))
                 return False
             
-            if self.last_tweet_time:
-                time_since_last = datetime.utcnow() - self.last_tweet_time
-                if time_since_last.total_seconds() < self.min_tweet_interval_minutes * 60:
-                    logger.debug("Tweet interval too short, queueing...")
-                    self.tweet_queue.append(text)
-                    return False
+            await self._post_sem.acquire()
+            if await self._send_tweet(text, reply_to):
+                return True
             
-            # Post tweet
+            # Nothing was posted, so the slot is still unused
+            self._post_sem.release()
+            return False
+    
+    async def _send_tweet(self, text: str, reply_to: Optional[int] = None) -> bool:
+        """Send a tweet to the API and update the counters"""
+        try:
             if reply_to:
                 response = await self.client.create_tweet(
                     text=text,
@@ -92,7 +191,7 @@ class SolyTwitterBot:
                 response = await self.client.create_tweet(text=text)
             
             self.tweets_today += 1
-            self.last_tweet_time = datetime.utcnow()
+            self.last_tweet_monotonic = time.monotonic()
             
             logger.info(f"📤 Posted tweet: {text[:50]}...")
             return True
@@ -101,26 +200,78 @@ class SolyTwitterBot:
             logger.error(f"Error posting tweet: {e}")
             return False
     
+    async def _drain_tweet_queue(self):
+        """Refill the posting slot each interval, handing it to the oldest queued tweet"""
+        interval = self._min_interval_s
+        
+        while self.is_running:
+            try:
+                # Decided under the send lock: an in-flight send owns the slot
+                # and has not yet stamped last_tweet_monotonic
+                async with self._send_lock:
+                    wait = 0.0
+                    if self.last_tweet_monotonic is not None:
+                        wait = interval - (time.monotonic() - self.last_tweet_monotonic)
+                    
+                    if wait <= 0:
+                        if self.tweet_queue and self.tweets_today < self.max_tweets_per_day:
+                            # The slot is handed to (or stays with) the queued tweet
+                            if not self._post_sem.locked():
+                                await self._post_sem.acquire()
+                            text, reply_to = self.tweet_queue.popleft()
+                            await self._send_tweet(text, reply_to)
+                            continue
+                        
+                        if self._post_sem.locked():
+                            self._post_sem.release()
+                        wait = interval
+                
+                await asyncio.sleep(wait)
+                
+            except Exception as e:
+                logger.error(f"Error draining tweet queue: {e}")
+                await asyncio.sleep(60)
+    
+    async def _reset_daily_count(self):
+        """Reset the daily tweet counter at each UTC midnight"""
+        while self.is_running:
+            now = datetime.utcnow()
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            await asyncio.sleep((midnight - now).total_seconds())
+            
+            self.tweets_today = 0
+            logger.debug("Daily tweet count reset")
+    
+    @staticmethod
+    def _next_occurrence(hour: int, now: datetime) -> float:
+        """Epoch seconds of the next hour:00 UTC strictly after now"""
+        target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(days=1)
+        return target.timestamp()
+    
     async def _post_scheduled_updates(self):
         """Post scheduled market updates"""
         logger.info("📅 Starting scheduled updates...")
         
-        schedule = [
-            {"hour": 8, "type": "morning_update"},
-            {"hour": 12, "type": "midday_alert"},
-            {"hour": 18, "type": "evening_recap"}
-        ]
+        # Min-heap of (fire time, update type); each pop is the next event
+        now = datetime.now(timezone.utc)
+        self._schedule_heap = [(self._next_occurrence(hour, now), update_type) for hour, update_type in SCHEDULE]
+        heapq.heapify(self._schedule_heap)
         
         while self.is_running:
             try:
-                current_hour = datetime.utcnow().hour
+                fire_ts = self._schedule_heap[0][0]
+                await asyncio.sleep(max(0, fire_ts - time.time()))
                 
-                for scheduled in schedule:
-                    if current_hour == scheduled["hour"]:
-                        await self._post_update(scheduled["type"])
+                # Everything due at this time fires together, then recurs tomorrow
+                due = []
+                while self._schedule_heap and self._schedule_heap[0][0] == fire_ts:
+                    due.append(heapq.heappop(self._schedule_heap)[1])
+                for update_type in due:
+                    heapq.heappush(self._schedule_heap, (fire_ts + 86400, update_type))
                 
-                # Check every hour
-                await asyncio.sleep(3600)
+                await asyncio.gather(*(self._post_update(update_type) for update_type in due))
                 
             except Exception as e:
                 logger.error(f"Error in scheduled updates: {e}")
@@ -147,18 +298,7 @@ class SolyTwitterBot:
         """Generate morning market update"""
         stats = await self.blockchain_monitor.get_stats()
         
-        tweet = f"""
-☀️ GM Trenchers!
-
-🔍 Monitoring {stats['tokens_monitored']} tokens today
-📊 Market sentiment: Looking stable
-⚠️ Stay alert for new launches
-
-Remember: DYOR, take profits, and never ape blindly! 
-
-#Solana #CryptoTrading #TrenchLife
-"""
-        return tweet.strip()
+        return MORNING_UPDATE_TEMPLATE.format(tokens_monitored=stats['tokens_monitored'])
     
     async def _generate_midday_alert(self) -> str:
         """Generate midday market alert"""
@@ -172,16 +312,7 @@ Remember: DYOR, take profits, and never ape blindly!
         
         tip = await self.ai_analyzer.generate_trading_tip(market_conditions)
         
-        tweet = f"""
-🔔 Midday Update
-
-💡 Trading Tip: {tip}
-
-Stay disciplined, stick to your strategy!
-
-#SolanaTips #CryptoTrading
-"""
-        return tweet.strip()
+        return MIDDAY_ALERT_TEMPLATE.format(tip=tip)
     
     async def _generate_evening_recap(self) -> str:
         """Generate evening market recap"""
@@ -198,21 +329,61 @@ Stay disciplined, stick to your strategy!
         
         return summary
     
+    @staticmethod
+    def _backoff_delay(error: Exception, attempt: int) -> float:
+        """Seconds to wait after an API error: honor rate-limit headers, else exponential with jitter"""
+        if isinstance(error, tweepy.TooManyRequests):
+            headers = error.response.headers
+            if "retry-after" in headers:
+                wait = float(headers["retry-after"])
+            elif "x-rate-limit-reset" in headers:
+                wait = float(headers["x-rate-limit-reset"]) - time.time()
+            else:
+                wait = 60
+            return max(wait, 0) + random.random() * 5
+        
+        return min(300, 2 ** attempt + random.random())
+    
     async def _monitor_mentions(self):
         """Monitor and respond to mentions"""
         logger.info("👂 Monitoring mentions...")
         
+        errors = 0
+        
         while self.is_running:
             try:
                 # Get recent mentions
                 # mentions = await self.client.get_users_mentions(user_id, max_results=10)
                 
-                # Process and respond to relevant mentions
+                # Process and respond to relevant mentions, e.g.
+                # await self._reply_to_mentions([(m.id, reply_text) for m in relevant])
+                errors = 0
                 await asyncio.sleep(300)  # Check every 5 minutes
                 
             except Exception as e:
                 logger.error(f"Error monitoring mentions: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self._backoff_delay(e, errors))
+                errors += 1
+    
+    async def _respond_to_mention(self, mention_id: int, text: str) -> bool:
+        """Reply to one mention, with at most a few replies in flight"""
+        async with self._mention_sem:
+            # Replies count toward the daily limit, including ones still being sent
+            if self.tweets_today + self._replies_in_flight >= self.max_tweets_per_day:
+                logger.warning("Daily tweet limit reached, skipping mention reply")
+                return False
+            
+            self._replies_in_flight += 1
+            try:
+                return await self._send_tweet(text, reply_to=mention_id)
+            finally:
+                self._replies_in_flight -= 1
+    
+    async def _reply_to_mentions(self, replies: List[Tuple[int, str]]) -> List[bool]:
+        """Reply to a burst of mentions concurrently, capped by the mention semaphore"""
+        return await asyncio.gather(*(
+            self._respond_to_mention(mention_id, text) for mention_id, text in replies
+        ))
     
     async def _post_alerts(self):
         """Post time-sensitive alerts"""
@@ -220,48 +391,42 @@ Stay disciplined, stick to your strategy!
         
         while self.is_running:
             try:
-                # Check for critical alerts
-                # - New token launches
-                # - Rug pulls detected
-                # - Whale movements
-                
-                await asyncio.sleep(30)  # Check every 30 seconds
+                # Wakes as soon as an alert is queued
+                token, analysis = await self.alert_queue.get()
+                await self.post_token_alert(token, analysis)
                 
             except Exception as e:
                 logger.error(f"Error in alert system: {e}")
-                await asyncio.sleep(60)
     
     async def _engage_with_community(self):
         """Engage with community posts"""
         logger.info("🤝 Community engagement active...")
         
+        errors = 0
+        
         while self.is_running:
             try:
                 # Like and retweet quality community content
                 # Respond to questions
                 # Share success stories
                 
+                errors = 0
                 await asyncio.sleep(600)  # Check every 10 minutes
                 
             except Exception as e:
                 logger.error(f"Error in community engagement: {e}")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self._backoff_delay(e, errors))
+                errors += 1
     
     async def post_token_alert(self, token: TokenLaunch, analysis: Dict):
         """Post an alert about a new token"""
-        risk_emoji = "🟢" if analysis['risk_score'] < 30 else "🟡" if analysis['risk_score'] < 70 else "🔴"
+        red_flags = analysis['red_flags']
         
-        tweet = f"""
-{risk_emoji} New Token Alert!
-
-${token.symbol} just launched
-Risk Score: {analysis['risk_score']}/100
-
-{f"⚠️ Red Flags: {', '.join(analysis['red_flags'][:2])}" if analysis['red_flags'] else ""}
-
-DYOR before aping! 🔬
-
-#Solana #NewToken
-"""
+        tweet = TOKEN_ALERT_TEMPLATE.format(
+            risk_emoji=get_risk_emoji(analysis['risk_score']),
+            symbol=token.symbol,
+            risk_score=analysis['risk_score'],
+            red_flags=RED_FLAGS_TEMPLATE.format(", ".join(red_flags[:2])) if red_flags else ""
+        )
         
-        await self.post_tweet(tweet.strip())
+        await self.post_tweet(tweet)
@@ -2,15 +2,56 @@
 Utility Functions - Helper functions used throughout the application
 """
 
+import bisect
+import functools
 import hashlib
+import itertools
+import struct
+import time
 import base58
-from typing import Optional, Dict, List
+from typing import Final, Optional, Dict, Iterable, Iterator, List, Tuple
 from datetime import datetime, timedelta
 import re
 
+import numpy as np
 
+# Compiled once at import; these run over every mention in the tweet stream
+_HANDLE_RE = re.compile(r'@(\w{1,15})')
+_SOL_ADDR_RE = re.compile(r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b')
+_WS_RE = re.compile(r'\s+')
+
+# Base58 alphabet (no 0, O, I or l)
+_B58_SET = frozenset("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz")
+
+# Bucket tables: thresholds (ascending) and one value per bucket, looked up with bisect
+_RISK_THRESH: Final[Tuple[float, ...]] = (30, 70)
+_RISK_EMOJI: Final[Tuple[str, ...]] = ("🟢", "🟡", "🔴")  # Low, medium, high risk
+
+_TREND_THRESH: Final[Tuple[float, ...]] = (-10, 0, 10)
+_TREND_EMOJI: Final[Tuple[str, ...]] = ("📉💥", "📉", "📈", "📈🚀")
+
+# Market activity per UTC hour (crypto is 24/7, but activity varies):
+# 1 PM - 9 PM is peak US hours, midnight - 8 AM is Asian hours
+_HOUR_STATUS: Final[Tuple[str, ...]] = tuple(
+    "asian" if 0 <= h <= 8 else "peak" if 13 <= h <= 21 else "normal"
+    for h in range(24)
+)
+
+_LIQUIDITY_THRESH: Final[Tuple[float, ...]] = (0.5, 1.0, 2.0)
+_LIQUIDITY_HEALTH: Final[Tuple[str, ...]] = ("Poor", "Fair", "Good", "Excellent")
+
+_NUMBER_THRESH: Final[Tuple[float, ...]] = (1_000, 1_000_000, 1_000_000_000)
+_NUMBER_DIVISOR: Final[Tuple[float, ...]] = (1, 1_000, 1_000_000, 1_000_000_000)
+_NUMBER_SUFFIX: Final[Tuple[str, ...]] = ("", "K", "M", "B")
+
+
+@functools.lru_cache(maxsize=4096)
 def is_valid_solana_address(address: str) -> bool:
-    """Validate a Solana wallet/token address"""
+    """Validate a Solana wallet/token address, memoized for repeat mentions"""
+    # Cheap length/alphabet checks reject most bad input before a full decode
+    if not 32 <= len(address) <= 44 or not _B58_SET.issuperset(address):
+        return False
+    
     try:
         decoded = base58.b58decode(address)
         return len(decoded) == 32
@@ -25,67 +66,70 @@ def shorten_address(address: str, chars: int = 4) -> str:
     return f"{address[:chars]}...{address[-chars:]}"
 
 
+# Factor columns and the value assumed when a factor is missing
+RISK_FACTOR_DEFAULTS = {
+    'mint_authority_revoked': False,
+    'freeze_authority_revoked': False,
+    'holder_count': 0,
+    'top_10_holdings_pct': 0,
+    'dev_holdings_pct': 0,
+    'liquidity_locked': False,
+    'liquidity_usd': 0,
+}
+
+
+def calculate_risk_scores(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Calculate risk scores (0-100) for many tokens at once
+    Takes one array per factor (see RISK_FACTOR_DEFAULTS); missing factors use the default
+    """
+    n = len(next(iter(arrays.values())))
+    
+    def column(name: str, dtype) -> np.ndarray:
+        if name in arrays:
+            return np.asarray(arrays[name], dtype=dtype)
+        return np.full(n, RISK_FACTOR_DEFAULTS[name], dtype=dtype)
+    
+    holder_count = column('holder_count', float)
+    top_10_pct = column('top_10_holdings_pct', float)
+    dev_holdings_pct = column('dev_holdings_pct', float)
+    
+    score = (
+        # Mint / freeze authority not renounced: +30 / +20
+        np.where(column('mint_authority_revoked', bool), 0.0, 30.0)
+        + np.where(column('freeze_authority_revoked', bool), 0.0, 20.0)
+        # Low holder count: +15 / +10
+        + np.select([holder_count < 50, holder_count < 100], [15.0, 10.0], default=0.0)
+        # High concentration in top 10: +20 / +15 / +10
+        + np.select([top_10_pct > 80, top_10_pct > 60, top_10_pct > 40], [20.0, 15.0, 10.0], default=0.0)
+        # High dev holdings: +15 / +10
+        + np.select([dev_holdings_pct > 20, dev_holdings_pct > 10], [15.0, 10.0], default=0.0)
+        # No liquidity lock: +20
+        + np.where(column('liquidity_locked', bool), 0.0, 20.0)
+        # Low liquidity: +10
+        + np.where(column('liquidity_usd', float) < 5000, 10.0, 0.0)
+    )
+    
+    # Cap at 100
+    return np.minimum(score, 100.0)
+
+
 def calculate_risk_score(factors: Dict) -> float:
     """
     Calculate risk score (0-100) based on various factors
     Higher score = higher risk
     """
-    score = 0.0
-    
-    # Mint authority not renounced: +30
-    if not factors.get('mint_authority_revoked', False):
-        score += 30.0
-    
-    # Freeze authority not renounced: +20
-    if not factors.get('freeze_authority_revoked', False):
-        score += 20.0
-    
-    # Low holder count: +15
-    holder_count = factors.get('holder_count', 0)
-    if holder_count < 50:
-        score += 15.0
-    elif holder_count < 100:
-        score += 10.0
-    
-    # High concentration in top 10: +20
-    top_10_pct = factors.get('top_10_holdings_pct', 0)
-    if top_10_pct > 80:
-        score += 20.0
-    elif top_10_pct > 60:
-        score += 15.0
-    elif top_10_pct > 40:
-        score += 10.0
-    
-    # High dev holdings: +15
-    dev_holdings_pct = factors.get('dev_holdings_pct', 0)
-    if dev_holdings_pct > 20:
-        score += 15.0
-    elif dev_holdings_pct > 10:
-        score += 10.0
-    
-    # No liquidity lock: +20
-    if not factors.get('liquidity_locked', False):
-        score += 20.0
-    
-    # Low liquidity: +10
-    liquidity_usd = factors.get('liquidity_usd', 0)
-    if liquidity_usd < 5000:
-        score += 10.0
-    
-    # Cap at 100
-    return min(score, 100.0)
+    arrays = {
+        name: np.array([factors.get(name, default)])
+        for name, default in RISK_FACTOR_DEFAULTS.items()
+    }
+    return float(calculate_risk_scores(arrays)[0])
 
 
 def format_large_number(num: float, decimals: int = 2) -> str:
     """Format large numbers with K, M, B suffixes"""
-    if num >= 1_000_000_000:
-        return f"${num/1_000_000_000:.{decimals}f}B"
-    elif num >= 1_000_000:
-        return f"${num/1_000_000:.{decimals}f}M"
-    elif num >= 1_000:
-        return f"${num/1_000:.{decimals}f}K"
-    else:
-        return f"${num:.{decimals}f}"
+    i = bisect.bisect_right(_NUMBER_THRESH, num)
+    return f"${num / _NUMBER_DIVISOR[i]:.{decimals}f}{_NUMBER_SUFFIX[i]}"
 
 
 def calculate_percentage_change(old_value: float, new_value: float) -> float:
@@ -97,18 +141,18 @@ def calculate_percentage_change(old_value: float, new_value: float) -> float:
 
 def extract_twitter_handle(text: str) -> Optional[str]:
     """Extract Twitter handle from text"""
-    match = re.search(r'@(\w{1,15})', text)
+    match = _HANDLE_RE.search(text)
     return match.group(1) if match else None
 
 
 def extract_solana_address(text: str) -> Optional[str]:
     """Extract Solana address from text"""
     # Solana addresses are base58 encoded, 32-44 characters
-    pattern = r'\b[1-9A-HJ-NP-Za-km-z]{32,44}\b'
-    match = re.search(pattern, text)
+    match = _SOL_ADDR_RE.search(text)
     
     if match:
         potential_address = match.group(0)
+        # Cached on the candidate, not the whole text, so repeat tokens hit
         if is_valid_solana_address(potential_address):
             return potential_address
     
@@ -134,20 +178,23 @@ def time_ago(dt: datetime) -> str:
 
 def sanitize_text_for_tweet(text: str, max_length: int = 280) -> str:
     """Sanitize and truncate text for Twitter"""
-    # Remove extra whitespace
-    text = ' '.join(text.split())
+    # Collapse runs of whitespace
+    text = _WS_RE.sub(' ', text).strip()
     
     # Truncate if too long
-    if len(text) > max_length:
-        text = text[:max_length-3] + "..."
-    
-    return text
+    return text if len(text) <= max_length else text[:max_length-3] + "..."
 
 
 def generate_alert_id(token_address: str, alert_type: str) -> str:
     """Generate a unique alert ID"""
-    data = f"{token_address}:{alert_type}:{datetime.utcnow().isoformat()}"
-    return hashlib.sha256(data.encode()).hexdigest()[:16]
+    # Only used for dedup, so a fast 64-bit BLAKE2b digest is plenty (still 16 hex chars)
+    h = hashlib.blake2b(digest_size=8)
+    h.update(token_address.encode())
+    h.update(b":")
+    h.update(alert_type.encode())
+    # Raw nanosecond timestamp, packed instead of formatted
+    h.update(struct.pack("<Q", time.time_ns()))
+    return h.hexdigest()
 
 
 def calculate_liquidity_health(liquidity_usd: float, volume_24h_usd: float) -> str:
@@ -156,42 +203,30 @@ def calculate_liquidity_health(liquidity_usd: float, volume_24h_usd: float) -> s
         return "Unknown"
     
     ratio = liquidity_usd / volume_24h_usd
-    
-    if ratio >= 2.0:
-        return "Excellent"
-    elif ratio >= 1.0:
-        return "Good"
-    elif ratio >= 0.5:
-        return "Fair"
-    else:
-        return "Poor"
+    return _LIQUIDITY_HEALTH[bisect.bisect_right(_LIQUIDITY_THRESH, ratio)]
 
 
 def get_risk_emoji(risk_score: float) -> str:
     """Get emoji based on risk score"""
-    if risk_score < 30:
-        return "🟢"  # Low risk
-    elif risk_score < 70:
-        return "🟡"  # Medium risk
-    else:
-        return "🔴"  # High risk
+    return _RISK_EMOJI[bisect.bisect_right(_RISK_THRESH, risk_score)]
 
 
 def get_trend_emoji(percentage_change: float) -> str:
     """Get emoji based on price trend"""
-    if percentage_change > 10:
-        return "📈🚀"
-    elif percentage_change > 0:
-        return "📈"
-    elif percentage_change > -10:
-        return "📉"
-    else:
-        return "📉💥"
+    # bisect_left: a change exactly on a threshold falls in the lower bucket
+    return _TREND_EMOJI[bisect.bisect_left(_TREND_THRESH, percentage_change)]
 
 
-def batch_list(items: List, batch_size: int) -> List[List]:
-    """Split a list into batches"""
-    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+def batch_list(items: Iterable, batch_size: int) -> Iterator[List]:
+    """Yield successive batches from an iterable without materializing them all"""
+    it = iter(items)
+    while chunk := list(itertools.islice(it, batch_size)):
+        yield chunk
+
+
+def batch_list_eager(items: Iterable, batch_size: int) -> List[List]:
+    """Split into a list of batches, for callers that need them all at once"""
+    return list(batch_list(items, batch_size))
 
 
 def is_weekend() -> bool:
@@ -201,12 +236,4 @@ def is_weekend() -> bool:
 
 def get_market_hours_status() -> str:
     """Get current market activity status"""
-    hour = datetime.utcnow().hour
-    
-    # Crypto markets are 24/7, but activity varies
-    if 13 <= hour <= 21:  # 1 PM - 9 PM UTC (peak US hours)
-        return "peak"
-    elif 0 <= hour <= 8:  # Midnight - 8 AM UTC (Asian hours)
-        return "asian"
-    else:
-        return "normal"
+    return _HOUR_STATUS[datetime.utcnow().hour]